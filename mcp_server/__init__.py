@@ -1,8 +1,16 @@
 """RenderDoc MCP Server"""
 
-from importlib.metadata import version, PackageNotFoundError
 
-try:
-    __version__ = version("renderdoc-mcp")
-except PackageNotFoundError:
-    __version__ = "dev"
+def __getattr__(name):
+    # Resolve the version on first access; importlib.metadata is slow to
+    # import and most importers (the bridge client, tool modules) never need it
+    if name == "__version__":
+        from importlib.metadata import version, PackageNotFoundError
+
+        try:
+            value = version("renderdoc-mcp")
+        except PackageNotFoundError:
+            value = "dev"
+        globals()["__version__"] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,19 +3,100 @@ RenderDoc Bridge Client
 Communicates with the RenderDoc extension via file-based IPC.
 """
 
+import asyncio
+import itertools
 import json
 import os
 import tempfile
+import threading
 import time
-import uuid
+import zlib
 from typing import Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
 
 # IPC directory (must match renderdoc_extension/socket_server.py)
 IPC_DIR = os.path.join(tempfile.gettempdir(), "renderdoc_mcp")
 REQUEST_FILE = os.path.join(IPC_DIR, "request.json")
+REQUEST_TMP_FILE = os.path.join(IPC_DIR, "request.json.tmp")
 RESPONSE_FILE = os.path.join(IPC_DIR, "response.json")
-LOCK_FILE = os.path.join(IPC_DIR, "lock")
+
+# Response envelope keys, used to slice out the raw result without decoding
+_RESULT_KEY = b'"result":'
+_ERROR_KEY = b'"error":'
+
+# First byte of a zlib stream; JSON responses start with "{" or "["
+_ZLIB_MAGIC = b"\x78"
+
+# Request envelope, formatted directly to bytes instead of building a dict
+# and encoding it. Method names are plain identifiers, so need no escaping.
+_REQUEST_TEMPLATE = b'{"id":"%s%d","method":"%s","params":%s%s}'
+_ACCEPT_ZLIB = b',"accept_encoding":"zlib"'
+
+# Where the request id starts in an encoded request (or the first of a batch)
+_ID_KEY = b'"id":"'
+
+# Start of an error envelope the extension could not tie to a request id
+# (e.g. the request failed to parse); taken as the answer to the pending one
+_NULL_ID_ERROR = b'{"id":null,"error":'
+
+# Initial size of each thread's response buffer; grown for larger responses
+# up to _BUFFER_MAX. Larger responses are read into a one-shot buffer, so
+# idle worker threads don't each keep a copy of the biggest payload seen.
+_BUFFER_SIZE = 256 * 1024
+_BUFFER_MAX = 1024 * 1024
+
+# Response polling backs off from the first interval to the last
+_POLL_MIN = 0.005
+_POLL_MAX = 0.05
+
+
+# JSON codec: orjson, then msgspec (with reusable encoder/decoder instances),
+# then the standard library
+if orjson is not None:
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+elif msgspec is not None:
+    _dumps = msgspec.json.Encoder().encode
+    _loads = msgspec.json.Decoder().decode
+else:
+
+    def _dumps(obj: Any) -> bytes:
+        """Encode obj as UTF-8 JSON bytes"""
+        return json.dumps(obj).encode("utf-8")
+
+    def _loads(data: bytes | memoryview) -> Any:
+        """Decode UTF-8 JSON bytes"""
+        # json takes bytes but not memoryview; bytes() of bytes is a no-op
+        return json.loads(bytes(data))
+
+
+def _extract_result(data: bytes | memoryview) -> str | None:
+    """
+    Slice the raw "result" value out of a response envelope.
+
+    The extension writes {"id": ..., "result": ...} with the id first, and the
+    id is generated here, so the result key sits within the first few bytes.
+    Returns None for error responses or any other layout.
+    """
+    head = bytes(data[:128])
+    key = head.find(_RESULT_KEY)
+    if key < 0 or _ERROR_KEY in head[:key]:
+        return None
+    # The envelope's closing brace, ignoring any trailing whitespace
+    end = len(data) - 1
+    while end > key and data[end] != 0x7D:
+        end -= 1
+    return str(memoryview(data)[key + len(_RESULT_KEY) : end], "utf-8").strip()
 
 
 class RenderDocBridgeError(Exception):
@@ -27,71 +108,232 @@ class RenderDocBridgeError(Exception):
 class RenderDocBridge:
     """Client for communicating with RenderDoc extension via file-based IPC"""
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 19876):
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = 19876, compress: bool = False
+    ):
         # host/port are kept for API compatibility but not used
         self.host = host
         self.port = port
+        # Ask the extension for zlib-compressed responses; extensions that
+        # don't know the field answer with plain JSON, which is still accepted
+        self.compress = compress
         self.timeout = 30.0  # seconds
+        # Set once a request has gone through, cleared on transport failure
+        self._connected = False
+        # The IPC directory holds a single request/response slot, so only one
+        # exchange may be in flight; concurrent tool calls queue here
+        self._lock = threading.Lock()
+        # Request ids only need to be unique per bridge; the pid prefix keeps
+        # them distinct from ids used by a previous server process
+        self._id_prefix = b"%d-" % os.getpid()
+        self._ids = itertools.count(1)
+        # Per-thread reusable response buffers. Responses are decoded after
+        # the exchange lock is released, so a buffer may only be reused by
+        # the thread that read into it (whose previous result is consumed).
+        self._buffers = threading.local()
+        # Set by close(); wakes any exchange waiting for a response
+        self._closed = threading.Event()
 
     def call(self, method: str, params: dict[str, Any] | None = None) -> Any:
         """Call a method on the RenderDoc extension"""
-        # Check if IPC directory exists
-        if not os.path.exists(IPC_DIR):
+        return self._unwrap(_loads(self._exchange(self._request(method, params))))
+
+    async def acall(self, method: str, params: dict[str, Any] | None = None) -> Any:
+        """Call a method from async code without blocking the event loop"""
+        return await asyncio.to_thread(self.call, method, params)
+
+    async def acall_raw(
+        self, method: str, params: dict[str, Any] | None = None
+    ) -> str:
+        """call_raw from async code without blocking the event loop"""
+        return await asyncio.to_thread(self.call_raw, method, params)
+
+    def call_raw(self, method: str, params: dict[str, Any] | None = None) -> str:
+        """
+        Call a method and return its result as undecoded JSON text.
+
+        For tools that hand the result straight back to the MCP client, this
+        avoids building the Python object tree only to have FastMCP encode it
+        again.
+        """
+        data = self._exchange(self._request(method, params))
+        raw = _extract_result(data)
+        if raw is None:
+            # Error response or unexpected layout: go through the decoded path
+            return _dumps(self._unwrap(_loads(data))).decode("utf-8")
+        return raw
+
+    def call_batch(
+        self,
+        calls: list[tuple[str, dict[str, Any] | None]],
+        return_errors: bool = False,
+    ) -> list[Any]:
+        """
+        Call several methods in a single round-trip.
+
+        The extension runs the requests in order and answers with one array;
+        results are returned in the same order, and the first error is raised.
+        With return_errors, a failed call's RenderDocBridgeError is returned
+        in place of its result instead.
+        """
+        batch = b",".join([self._request(m, p) for m, p in calls])
+        responses = _loads(self._exchange(b"[%s]" % batch))
+        if not isinstance(responses, list):
+            # A failure before dispatch comes back as a single envelope
+            self._unwrap(responses)
+            raise RenderDocBridgeError("Unexpected response to batch request")
+
+        if not return_errors:
+            return [self._unwrap(response) for response in responses]
+        results: list[Any] = []
+        for response in responses:
+            try:
+                results.append(self._unwrap(response))
+            except RenderDocBridgeError as e:
+                results.append(e)
+        return results
+
+    async def acall_batch(
+        self,
+        calls: list[tuple[str, dict[str, Any] | None]],
+        return_errors: bool = False,
+    ) -> list[Any]:
+        """call_batch from async code without blocking the event loop"""
+        return await asyncio.to_thread(self.call_batch, calls, return_errors)
+
+    def new_blob_path(self) -> str:
+        """
+        Return a fresh path in the IPC directory for the extension to write a
+        large payload to, outside the JSON response.
+        """
+        name = b"blob-%s%d" % (self._id_prefix, next(self._ids))
+        return os.path.join(IPC_DIR, name.decode("ascii"))
+
+    def close(self) -> None:
+        """Abort any pending call and make further calls fail immediately"""
+        self._closed.set()
+
+    def _unwrap(self, response: dict[str, Any]) -> Any:
+        """Return the result of a decoded response, raising on error"""
+        if "error" in response:
+            error = response["error"]
+            raise RenderDocBridgeError(f"[{error['code']}] {error['message']}")
+        return response.get("result")
+
+    def _request(self, method: str, params: dict[str, Any] | None) -> bytes:
+        """Encode a request envelope with a fresh id"""
+        return _REQUEST_TEMPLATE % (
+            self._id_prefix,
+            next(self._ids),
+            method.encode("ascii"),
+            _dumps(params) if params else b"{}",
+            _ACCEPT_ZLIB if self.compress else b"",
+        )
+
+    def _exchange(self, request: bytes) -> bytes | memoryview:
+        """
+        Send an encoded request (or batch) and return the raw response.
+
+        The result may be a view of this thread's response buffer, valid until
+        the thread's next exchange; decode it before making another call.
+        """
+        with self._lock:
+            return self._exchange_locked(request)
+
+    def _exchange_locked(self, request: bytes) -> bytes | memoryview:
+        # Only probe the IPC directory until a request has gone through;
+        # any transport failure resets this
+        if not self._connected and not os.path.exists(IPC_DIR):
             raise RenderDocBridgeError(
                 f"Cannot connect to RenderDoc MCP Bridge at {self.host}:{self.port}. "
                 "Make sure RenderDoc is running with the MCP Bridge extension loaded."
             )
 
-        request = {
-            "id": str(uuid.uuid4()),
-            "method": method,
-            "params": params or {},
-        }
+        # The response must carry this request's id (quoted); the id is
+        # echoed first, so it is looked for near the start only
+        start = request.index(_ID_KEY) + len(_ID_KEY)
+        expected_id = request[start - 1 : request.index(b'"', start) + 1]
+        id_window = len(expected_id) + 16
 
         try:
             # Clean up any stale response file
-            if os.path.exists(RESPONSE_FILE):
+            try:
                 os.remove(RESPONSE_FILE)
+            except FileNotFoundError:
+                pass
 
-            # Create lock file to signal we're writing
-            with open(LOCK_FILE, "w") as f:
-                f.write("lock")
-
-            # Write request
-            with open(REQUEST_FILE, "w", encoding="utf-8") as f:
-                json.dump(request, f)
+            self._publish(request)
 
-            # Remove lock file to signal write complete
-            os.remove(LOCK_FILE)
-
-            # Wait for response
-            start_time = time.time()
+            # Wait for response, polling quickly at first and backing off
+            deadline = time.monotonic() + self.timeout
+            interval = _POLL_MIN
             while True:
-                if os.path.exists(RESPONSE_FILE):
-                    # Small delay to ensure file is fully written
-                    time.sleep(0.01)
-
-                    # Read response
-                    with open(RESPONSE_FILE, "r", encoding="utf-8") as f:
-                        response = json.load(f)
+                # Open the response directly rather than probing for it
+                # first; a miss costs the same single syscall as the probe.
+                # The extension renames the finished response into place, so
+                # it can be read as soon as it appears. Read it in one binary
+                # read; the decoder takes the UTF-8 bytes directly.
+                try:
+                    with open(RESPONSE_FILE, "rb", buffering=0) as f:
+                        data = self._read(f)
 
                     # Clean up response file
                     os.remove(RESPONSE_FILE)
-
-                    if "error" in response:
-                        error = response["error"]
-                        raise RenderDocBridgeError(f"[{error['code']}] {error['message']}")
-
-                    return response.get("result")
+                except (FileNotFoundError, PermissionError):
+                    # Not there yet, or still held open by the extension
+                    # (Windows); poll again
+                    pass
+                else:
+                    self._connected = True
+                    if data[:1] == _ZLIB_MAGIC:
+                        data = zlib.decompress(data)
+                    head = bytes(data[:id_window])
+                    if expected_id in head or head.startswith(_NULL_ID_ERROR):
+                        return data
+                    # Late answer to an earlier request that timed out;
+                    # drop it and keep waiting for ours
 
                 # Check timeout
-                if time.time() - start_time > self.timeout:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
                     raise RenderDocBridgeError("Request timed out")
 
-                # Poll interval
-                time.sleep(0.05)
+                # Poll interval; close() cuts the wait short
+                if self._closed.wait(min(interval, remaining)):
+                    raise RenderDocBridgeError("Bridge closed")
+                interval = min(interval * 2, _POLL_MAX)
 
         except RenderDocBridgeError:
+            self._connected = False
             raise
         except Exception as e:
+            self._connected = False
             raise RenderDocBridgeError(f"Communication error: {e}")
+
+    def _read(self, f: Any) -> bytes | memoryview:
+        """Read an open response file into this thread's reusable buffer"""
+        size = os.fstat(f.fileno()).st_size
+        if size > _BUFFER_MAX:
+            return f.readall()
+        buf = getattr(self._buffers, "buf", None)
+        if buf is None or len(buf) < size:
+            # Replaced rather than resized: views of the old one may be alive
+            buf = self._buffers.buf = bytearray(max(size, _BUFFER_SIZE))
+        view = memoryview(buf)
+        return view[: f.readinto(view[:size])]
+
+    def _publish(self, data: bytes) -> None:
+        """Write the request file, retrying once on a transient sharing error"""
+        for attempt in range(2):
+            try:
+                # Write to a temp file and rename it into place, so the
+                # extension never sees a partial request (replaces the lock file)
+                with open(REQUEST_TMP_FILE, "wb") as f:
+                    f.write(data)
+                os.replace(REQUEST_TMP_FILE, REQUEST_FILE)
+                return
+            except PermissionError:
+                # The extension may still hold the previous request open
+                if attempt:
+                    raise
+                time.sleep(0.01)
@@ -9,6 +9,14 @@ class Settings:
     def __init__(self):
         self.renderdoc_host = os.environ.get("RENDERDOC_MCP_HOST", "127.0.0.1")
         self.renderdoc_port = int(os.environ.get("RENDERDOC_MCP_PORT", "19876"))
+        # Opt-in zlib compression of bridge responses
+        self.compress_responses = os.environ.get(
+            "RENDERDOC_MCP_COMPRESS", ""
+        ).lower() in ("1", "true", "yes")
+        # Opt-in passthrough of large tool results as the extension's JSON text
+        self.raw_results = os.environ.get(
+            "RENDERDOC_MCP_RAW_RESULTS", ""
+        ).lower() in ("1", "true", "yes")
 
 
 settings = Settings()
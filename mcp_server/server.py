@@ -3,13 +3,19 @@ RenderDoc MCP Server
 FastMCP 2.0 server providing access to RenderDoc capture data.
 """
 
+import asyncio
+import inspect
+import os
+import re
+import shutil
 from pathlib import Path
-from typing import Literal
+from typing import Any, Callable, Literal
 
 from fastmcp import FastMCP
+from fastmcp.tools.tool import ToolResult
+from pydantic import BaseModel, ConfigDict, create_model
 
-from . import __version__
-from .bridge.client import RenderDocBridge
+from .bridge.client import RenderDocBridge, RenderDocBridgeError
 from .config import settings
 
 # Initialize FastMCP server
@@ -18,28 +24,160 @@ mcp = FastMCP(
 )
 
 # RenderDoc bridge client
-bridge = RenderDocBridge(host=settings.renderdoc_host, port=settings.renderdoc_port)
+bridge = RenderDocBridge(
+    host=settings.renderdoc_host,
+    port=settings.renderdoc_port,
+    compress=settings.compress_responses,
+)
+
+# Bound once; every tool goes through these. Tools are async and await the
+# a* variants, which run the blocking exchange in a worker thread, so the
+# event loop keeps serving the client while RenderDoc works
+_call = bridge.call
+_acall = bridge.acall
+_acall_raw = bridge.acall_raw
+_acall_batch = bridge.acall_batch
+
+# Registration for the tools with potentially large results. Raw results are
+# plain text content with no structuredContent, so those tools can't declare
+# an output schema when RENDERDOC_MCP_RAW_RESULTS is set
+_LARGE_RESULT_TOOL: dict[str, Any] = (
+    {"output_schema": None} if settings.raw_results else {}
+)
+
+# Characters replaced with "_" when building shader file/directory names.
+# \w matches the same characters as str.isalnum() plus "_", so non-ASCII
+# capture names are kept as-is.
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w.\-]")
+_UNSAFE_CAPTURE_NAME_CHARS = re.compile(r"[^\w.\- ]")
+
+# Flags for writing shader files; O_BINARY keeps Windows from translating
+# newlines
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+# Shader stage argument, shared by the shader tools. Defined once so every
+# signature refers to the same type and FastMCP builds its validator once.
+ShaderStage = Literal["vertex", "hull", "domain", "geometry", "pixel", "compute"]
+
+
+# Tools that batch_execute can dispatch to, by name, with a model of each
+# tool's parameters; batch entries are validated against it like direct calls
+_batch_tools: dict[str, tuple[Callable[..., Any], type[BaseModel]]] = {}
+
+# Batchable tools whose body only forwards their arguments (None left out) to
+# the extension method of the same name. batch_execute sends runs of these in
+# a single round-trip instead of calling them.
+_forwarded_tools: set[str] = set()
+
+
+def _batchable(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Register a tool function for use from batch_execute"""
+    # A second definition would silently shadow the first
+    if fn.__name__ in _batch_tools:
+        raise ValueError(f"Tool defined twice: {fn.__name__}")
+    fields: dict[str, Any] = {
+        name: (
+            param.annotation,
+            ... if param.default is param.empty else param.default,
+        )
+        for name, param in inspect.signature(fn).parameters.items()
+    }
+    params = create_model(
+        f"{fn.__name__}_params", __config__=ConfigDict(extra="forbid"), **fields
+    )
+    _batch_tools[fn.__name__] = (fn, params)
+    return fn
+
+
+def _forwarded(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Mark a batchable tool as a plain forward to the extension"""
+    _forwarded_tools.add(fn.__name__)
+    return fn
+
+
+def _move_file(src: str, dst: str) -> None:
+    """Rename src to dst, copying instead when they are on different volumes"""
+    try:
+        os.replace(src, dst)
+    except OSError:
+        shutil.move(src, dst)
+
+
+def _discard(path: str) -> None:
+    """Remove a side file if it is still there"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _save_blob(method: str, params: dict, output_path: str) -> dict:
+    """
+    Call a resource-reading method with the data written to a side file, then
+    move that file to output_path.
+
+    The bytes go from the extension to disk as-is, with no base64 or JSON
+    encoding on the way.
+    """
+    blob_path = bridge.new_blob_path()
+    params["data_blob"] = blob_path
+    try:
+        result = _call(method, params)
+        path = Path(output_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        resolved_path = str(path.resolve())
+        _move_file(blob_path, resolved_path)
+    finally:
+        _discard(blob_path)
+    result["file_path"] = resolved_path
+    return result
+
+
+async def _large_result(method: str, params: dict | None = None) -> dict | ToolResult:
+    """
+    Forward a call for a tool with a potentially large result.
+
+    With raw results enabled the extension's JSON result text is returned
+    as-is, so it is not decoded and then re-encoded by FastMCP; otherwise
+    the decoded result is returned like any other tool's.
+    """
+    if settings.raw_results:
+        return ToolResult(content=await _acall_raw(method, params))
+    return await _acall(method, params)
+
+
+def _pack(**kwargs: Any) -> dict[str, Any]:
+    """Build a params dict, leaving out None so the extension uses its default"""
+    return {k: v for k, v in kwargs.items() if v is not None}
 
 
 @mcp.tool
+@_batchable
 def get_version() -> dict:
     """
     Get the current version of the RenderDoc MCP server.
     """
+    from . import __version__
+
     return {"version": __version__}
 
 
 @mcp.tool
-def get_capture_status() -> dict:
+@_batchable
+@_forwarded
+async def get_capture_status() -> dict:
     """
     Check if a capture is currently loaded in RenderDoc.
     Returns the capture status and API type if loaded.
     """
-    return bridge.call("get_capture_status")
+    return await _acall("get_capture_status")
 
 
-@mcp.tool
-def get_draw_calls(
+@mcp.tool(**_LARGE_RESULT_TOOL)
+@_batchable
+@_forwarded
+async def get_draw_calls(
     include_children: bool = True,
     marker_filter: str | None = None,
     exclude_markers: list[str] | None = None,
@@ -47,6 +185,7 @@ def get_draw_calls(
     event_id_max: int | None = None,
     only_actions: bool = False,
     flags_filter: list[str] | None = None,
+    compact: bool = False,
 ) -> dict:
     """
     Get the list of all draw calls and actions in the current capture.
@@ -59,28 +198,31 @@ def get_draw_calls(
         event_id_max: Only include actions with event_id <= this value
         only_actions: If True, exclude marker actions (PushMarker/PopMarker/SetMarker)
         flags_filter: Only include actions with these flags (list of flag names, e.g. ["Drawcall", "Dispatch"])
+        compact: Return the actions as parallel lists (event_ids, action_ids, names,
+            flags, num_indices, num_instances) instead of one object per action.
+            Requires include_children=False. Flags are raw bit masks; flag_bits
+            maps each flag name to its bit.
 
     Returns a hierarchical tree of actions including markers, draw calls,
     dispatches, and other GPU events.
     """
-    params: dict[str, object] = {"include_children": include_children}
-    if marker_filter is not None:
-        params["marker_filter"] = marker_filter
-    if exclude_markers is not None:
-        params["exclude_markers"] = exclude_markers
-    if event_id_min is not None:
-        params["event_id_min"] = event_id_min
-    if event_id_max is not None:
-        params["event_id_max"] = event_id_max
-    if only_actions:
-        params["only_actions"] = only_actions
-    if flags_filter is not None:
-        params["flags_filter"] = flags_filter
-    return bridge.call("get_draw_calls", params)
+    params = _pack(
+        include_children=include_children,
+        marker_filter=marker_filter,
+        exclude_markers=exclude_markers,
+        event_id_min=event_id_min,
+        event_id_max=event_id_max,
+        only_actions=only_actions,
+        flags_filter=flags_filter,
+        compact=compact,
+    )
+    return await _large_result("get_draw_calls", params)
 
 
 @mcp.tool
-def get_frame_summary() -> dict:
+@_batchable
+@_forwarded
+async def get_frame_summary() -> dict:
     """
     Get a summary of the current capture frame.
 
@@ -91,14 +233,15 @@ def get_frame_summary() -> dict:
     - Top-level markers with event IDs and child counts
     - Resource counts: textures, buffers
     """
-    return bridge.call("get_frame_summary")
+    return await _acall("get_frame_summary")
 
 
 @mcp.tool
-def find_draws_by_shader(
+@_batchable
+@_forwarded
+async def find_draws_by_shader(
     shader_name: str,
-    stage: Literal["vertex", "hull", "domain", "geometry", "pixel", "compute"]
-    | None = None,
+    stage: ShaderStage | None = None,
 ) -> dict:
     """
     Find all draw calls using a shader with the given name (partial match).
@@ -109,14 +252,14 @@ def find_draws_by_shader(
 
     Returns a list of matching draw calls with event IDs and match reasons.
     """
-    params: dict[str, object] = {"shader_name": shader_name}
-    if stage is not None:
-        params["stage"] = stage
-    return bridge.call("find_draws_by_shader", params)
+    params = _pack(shader_name=shader_name, stage=stage)
+    return await _acall("find_draws_by_shader", params)
 
 
 @mcp.tool
-def find_draws_by_texture(texture_name: str) -> dict:
+@_batchable
+@_forwarded
+async def find_draws_by_texture(texture_name: str) -> dict:
     """
     Find all draw calls using a texture with the given name (partial match).
 
@@ -126,11 +269,13 @@ def find_draws_by_texture(texture_name: str) -> dict:
     Returns a list of matching draw calls with event IDs and match reasons.
     Searches SRVs, UAVs, and render targets.
     """
-    return bridge.call("find_draws_by_texture", {"texture_name": texture_name})
+    return await _acall("find_draws_by_texture", {"texture_name": texture_name})
 
 
 @mcp.tool
-def find_draws_by_resource(resource_id: str) -> dict:
+@_batchable
+@_forwarded
+async def find_draws_by_resource(resource_id: str) -> dict:
     """
     Find all draw calls using a specific resource ID (exact match).
 
@@ -140,11 +285,13 @@ def find_draws_by_resource(resource_id: str) -> dict:
     Returns a list of matching draw calls with event IDs and match reasons.
     Searches shaders, SRVs, UAVs, render targets, and depth targets.
     """
-    return bridge.call("find_draws_by_resource", {"resource_id": resource_id})
+    return await _acall("find_draws_by_resource", {"resource_id": resource_id})
 
 
 @mcp.tool
-def get_draw_call_details(event_id: int) -> dict:
+@_batchable
+@_forwarded
+async def get_draw_call_details(event_id: int) -> dict:
     """
     Get detailed information about a specific draw call.
 
@@ -153,11 +300,13 @@ def get_draw_call_details(event_id: int) -> dict:
 
     Includes vertex/index counts, resource outputs, and other metadata.
     """
-    return bridge.call("get_draw_call_details", {"event_id": event_id})
+    return await _acall("get_draw_call_details", {"event_id": event_id})
 
 
-@mcp.tool
-def get_action_timings(
+@mcp.tool(**_LARGE_RESULT_TOOL)
+@_batchable
+@_forwarded
+async def get_action_timings(
     event_ids: list[int] | None = None,
     marker_filter: str | None = None,
     exclude_markers: list[str] | None = None,
@@ -180,20 +329,20 @@ def get_action_timings(
 
     Note: GPU timing counters may not be available on all hardware/drivers.
     """
-    params: dict[str, object] = {}
-    if event_ids is not None:
-        params["event_ids"] = event_ids
-    if marker_filter is not None:
-        params["marker_filter"] = marker_filter
-    if exclude_markers is not None:
-        params["exclude_markers"] = exclude_markers
-    return bridge.call("get_action_timings", params)
+    params = _pack(
+        event_ids=event_ids,
+        marker_filter=marker_filter,
+        exclude_markers=exclude_markers,
+    )
+    return await _large_result("get_action_timings", params)
 
 
-@mcp.tool
-def get_shader_info(
+@mcp.tool(**_LARGE_RESULT_TOOL)
+@_batchable
+@_forwarded
+async def get_shader_info(
     event_id: int,
-    stage: Literal["vertex", "hull", "domain", "geometry", "pixel", "compute"],
+    stage: ShaderStage,
 ) -> dict:
     """
     Get shader information for a specific stage at a given event.
@@ -206,13 +355,14 @@ def get_shader_info(
     constant buffer values, resource bindings, and the list of available
     disassembly targets.
     """
-    return bridge.call("get_shader_info", {"event_id": event_id, "stage": stage})
+    return await _large_result("get_shader_info", {"event_id": event_id, "stage": stage})
 
 
 @mcp.tool
-def get_shader_source(
+@_batchable
+async def get_shader_source(
     event_id: int,
-    stage: Literal["vertex", "hull", "domain", "geometry", "pixel", "compute"],
+    stage: ShaderStage,
     output_dir: str | None = None,
     target: str | None = None,
 ) -> dict:
@@ -257,13 +407,37 @@ def get_shader_source(
         - entry_point: Shader entry point name
         - resource_id: Shader resource ID
     """
-    params: dict[str, object] = {"event_id": event_id, "stage": stage}
-    if target is not None:
-        params["target"] = target
-    result = bridge.call("get_shader_source", params)
+    return await asyncio.to_thread(
+        _get_shader_source, event_id, stage, output_dir, target
+    )
+
 
+def _get_shader_source(
+    event_id: int, stage: str, output_dir: str | None, target: str | None
+) -> dict:
+    """Fetch a shader's source and save it to a file (runs in a worker thread)"""
+    # The extension writes the source to this side file instead of embedding
+    # it in the JSON response; it is then renamed into place
+    blob_path = bridge.new_blob_path()
+    params = _pack(
+        event_id=event_id, stage=stage, target=target, source_blob=blob_path
+    )
+    try:
+        result = _call("get_shader_source", params)
+        return _save_shader_source(result, event_id, stage, output_dir, blob_path)
+    finally:
+        _discard(blob_path)
+
+
+def _save_shader_source(
+    result: dict, event_id: int, stage: str, output_dir: str | None, blob_path: str
+) -> dict:
+    """
+    Save the shader source from a get_shader_source result and describe the file.
+    """
+    source_size = result.get("source_size", 0)
     source_code = result.get("source_code", "")
-    if not source_code:
+    if not source_size and not source_code:
         return {
             "error": "No shader source code available",
             "details": result.get("error", "Unknown error"),
@@ -289,7 +463,7 @@ def get_shader_source(
         filename = "shader_eid%d_%s%s" % (event_id, stage, ext)
 
     # Sanitize filename
-    filename = "".join(c if c.isalnum() or c in "._-" else "_" for c in filename)
+    filename = _UNSAFE_FILENAME_CHARS.sub("_", filename)
 
     # Determine output directory
     if output_dir:
@@ -298,12 +472,16 @@ def get_shader_source(
         # Default: renderdoc/<capture_name>/ under current working directory
         save_dir = Path.cwd() / "renderdoc"
         try:
-            status = bridge.call("get_capture_status")
-            capture_filename = status.get("filename", "")
+            # Sent along with the source; extensions predating that need a
+            # separate status call
+            capture_filename = result.get("capture_filename")
+            if capture_filename is None:
+                status = _call("get_capture_status")
+                capture_filename = status.get("filename", "")
             if capture_filename:
                 capture_name = Path(capture_filename).stem
-                capture_name = "".join(
-                    c if c.isalnum() or c in "._- " else "_" for c in capture_name
+                capture_name = _UNSAFE_CAPTURE_NAME_CHARS.sub(
+                    "_", capture_name
                 ).strip()
                 if capture_name:
                     save_dir = save_dir / capture_name
@@ -311,13 +489,27 @@ def get_shader_source(
             pass
 
     save_dir.mkdir(parents=True, exist_ok=True)
-    file_path = save_dir / filename
+    resolved_path = str(save_dir.resolve() / filename)
 
-    # Write file
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(source_code)
+    if source_size:
+        # Already on disk as UTF-8; move it rather than copying it through here
+        _move_file(blob_path, resolved_path)
+        file_size = source_size
+        line_count = result.get("source_lines", 0)
+    else:
+        # Extension without side-file support: the source came inline.
+        # Encode once and write the bytes as-is; the size and line count come
+        # from the same buffer instead of a stat call and another pass
+        data = source_code.encode("utf-8")
+        del source_code
+        fd = os.open(resolved_path, _WRITE_FLAGS, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        file_size = len(data)
+        line_count = data.count(b"\n") + 1
 
-    resolved_path = str(file_path.resolve())
     # Build a clickable file link for AI chat display (use forward slashes for URI)
     file_uri = resolved_path.replace("\\", "/")
     file_link = "[%s](%s)" % (filename, file_uri)
@@ -325,8 +517,8 @@ def get_shader_source(
     return {
         "file_path": resolved_path,
         "file_link": file_link,
-        "file_size": file_path.stat().st_size,
-        "line_count": source_code.count("\n") + 1,
+        "file_size": file_size,
+        "line_count": line_count,
         "stage": stage,
         "target": result.get("target", "unknown"),
         "available_targets": result.get("available_targets", []),
@@ -335,8 +527,10 @@ def get_shader_source(
     }
 
 
-@mcp.tool
-def get_buffer_contents(
+@mcp.tool(**_LARGE_RESULT_TOOL)
+@_batchable
+@_forwarded
+async def get_buffer_contents(
     resource_id: str,
     offset: int = 0,
     length: int = 0,
@@ -350,15 +544,46 @@ def get_buffer_contents(
         length: Number of bytes to read, 0 for entire buffer (default: 0)
 
     Returns buffer data as base64-encoded bytes along with metadata.
+    For large buffers, prefer save_buffer_contents.
     """
-    return bridge.call(
+    params = {"resource_id": resource_id, "offset": offset, "length": length}
+    return await _large_result("get_buffer_contents", params)
+
+
+@mcp.tool
+@_batchable
+async def save_buffer_contents(
+    resource_id: str,
+    output_path: str,
+    offset: int = 0,
+    length: int = 0,
+) -> dict:
+    """
+    Save the contents of a buffer resource to a local file as raw bytes.
+
+    Unlike get_buffer_contents, the data is not returned base64-encoded in the
+    response, so this is the better choice for large buffers.
+
+    Args:
+        resource_id: The resource ID of the buffer to read
+        output_path: Path of the file to write (parent directories are created)
+        offset: Byte offset to start reading from (default: 0)
+        length: Number of bytes to read, 0 for entire buffer (default: 0)
+
+    Returns buffer metadata and file_path, the absolute path of the written file.
+    """
+    return await asyncio.to_thread(
+        _save_blob,
         "get_buffer_contents",
         {"resource_id": resource_id, "offset": offset, "length": length},
+        output_path,
     )
 
 
 @mcp.tool
-def get_texture_info(resource_id: str) -> dict:
+@_batchable
+@_forwarded
+async def get_texture_info(resource_id: str) -> dict:
     """
     Get metadata about a texture resource.
 
@@ -367,16 +592,20 @@ def get_texture_info(resource_id: str) -> dict:
 
     Includes dimensions, format, mip levels, and other properties.
     """
-    return bridge.call("get_texture_info", {"resource_id": resource_id})
+    return await _acall("get_texture_info", {"resource_id": resource_id})
 
 
-@mcp.tool
-def get_texture_data(
+@mcp.tool(**_LARGE_RESULT_TOOL)
+@_batchable
+@_forwarded
+async def get_texture_data(
     resource_id: str,
     mip: int = 0,
     slice: int = 0,
     sample: int = 0,
     depth_slice: int | None = None,
+    offset: int = 0,
+    length: int = 0,
 ) -> dict:
     """
     Read the pixel data of a texture resource.
@@ -389,18 +618,70 @@ def get_texture_data(
         sample: MSAA sample index (default: 0)
         depth_slice: For 3D textures only, extract a specific depth slice (default: None = full volume)
                      When specified, returns only the 2D slice at that depth index
+        offset: Byte offset into the (sliced) pixel data to start from (default: 0)
+        length: Number of bytes to return, 0 for the rest of the data (default: 0)
+                Use offset/length to read a large texture in pieces; total_size
+                in the result is the full data size.
 
     Returns texture pixel data as base64-encoded bytes along with metadata
     including dimensions at the requested mip level and format information.
-    """
-    params = {"resource_id": resource_id, "mip": mip, "slice": slice, "sample": sample}
-    if depth_slice is not None:
-        params["depth_slice"] = depth_slice
-    return bridge.call("get_texture_data", params)
+    For large textures, prefer save_texture_data.
+    """
+    params = _pack(
+        resource_id=resource_id,
+        mip=mip,
+        slice=slice,
+        sample=sample,
+        depth_slice=depth_slice,
+        offset=offset,
+        length=length,
+    )
+    return await _large_result("get_texture_data", params)
 
 
 @mcp.tool
-def get_pipeline_state(event_id: int) -> dict:
+@_batchable
+async def save_texture_data(
+    resource_id: str,
+    output_path: str,
+    mip: int = 0,
+    slice: int = 0,
+    sample: int = 0,
+    depth_slice: int | None = None,
+) -> dict:
+    """
+    Save the pixel data of a texture resource to a local file as raw bytes.
+
+    Unlike get_texture_data, the data is not returned base64-encoded in the
+    response, so this is the better choice for large textures.
+
+    Args:
+        resource_id: The resource ID of the texture to read
+        output_path: Path of the file to write (parent directories are created)
+        mip: Mip level to retrieve (default: 0)
+        slice: Array slice or cube face index (default: 0)
+        sample: MSAA sample index (default: 0)
+        depth_slice: For 3D textures only, extract a specific depth slice (default: None = full volume)
+
+    Returns texture metadata (dimensions, format, data_length) and file_path,
+    the absolute path of the written file.
+    """
+    params = _pack(
+        resource_id=resource_id,
+        mip=mip,
+        slice=slice,
+        sample=sample,
+        depth_slice=depth_slice,
+    )
+    return await asyncio.to_thread(
+        _save_blob, "get_texture_data", params, output_path
+    )
+
+
+@mcp.tool(**_LARGE_RESULT_TOOL)
+@_batchable
+@_forwarded
+async def get_pipeline_state(event_id: int) -> dict:
     """
     Get the full graphics pipeline state at a specific event.
 
@@ -416,11 +697,13 @@ def get_pipeline_state(event_id: int) -> dict:
     - Render targets and depth target
     - Viewports and input assembly state
     """
-    return bridge.call("get_pipeline_state", {"event_id": event_id})
+    return await _large_result("get_pipeline_state", {"event_id": event_id})
 
 
 @mcp.tool
-def list_captures(directory: str) -> dict:
+@_batchable
+@_forwarded
+async def list_captures(directory: str) -> dict:
     """
     List all RenderDoc capture files (.rdc) in the specified directory.
 
@@ -433,11 +716,12 @@ def list_captures(directory: str) -> dict:
     - size_bytes: File size in bytes
     - modified_time: Last modified timestamp (ISO format)
     """
-    return bridge.call("list_captures", {"directory": directory})
+    return await _acall("list_captures", {"directory": directory})
 
 
 @mcp.tool
-def open_capture(capture_path: str) -> dict:
+@_batchable
+async def open_capture(capture_path: str) -> dict:
     """
     Open a RenderDoc capture file (.rdc).
 
@@ -447,15 +731,99 @@ def open_capture(capture_path: str) -> dict:
     Returns success status and information about the opened capture.
     Note: This will close any currently open capture.
     """
-    return bridge.call("open_capture", {"capture_path": capture_path})
+    return await _acall("open_capture", {"capture_path": capture_path})
+
+
+@mcp.tool
+async def batch_execute(calls: list[dict], stop_on_error: bool = False) -> dict:
+    """
+    Run several tools in one request.
+
+    Use this instead of many separate tool calls when you need the same lookup
+    for a lot of inputs (e.g. get_draw_call_details for 50 event IDs).
+    Consecutive lookups are sent to RenderDoc together in one round-trip.
+
+    Args:
+        calls: List of {"tool": <tool name>, "params": {<tool arguments>}}
+               entries, run in order
+        stop_on_error: Stop at the first failing call instead of continuing
+
+    Returns:
+        - results: One entry per call, in order (null for failed calls)
+        - errors: List of {index, tool, error} for the calls that failed
+    """
+    results: list[Any] = []
+    errors: list[dict] = []
+    # Forwarded calls not sent yet, as (tool, params); tool names double as
+    # extension method names
+    queued: list[tuple[str, dict]] = []
+
+    def record(tool: str, outcome: Any) -> bool:
+        """Add a call's result, or its error; False if it failed"""
+        if isinstance(outcome, Exception):
+            errors.append({"index": len(results), "tool": tool, "error": str(outcome)})
+            results.append(None)
+            return False
+        results.append(outcome)
+        return True
+
+    async def flush() -> bool:
+        """Send the queued calls in one round-trip; False to stop the batch"""
+        sent = queued[:]
+        queued.clear()
+        if not sent:
+            return True
+        try:
+            outcomes = await _acall_batch(sent, return_errors=True)
+        except RenderDocBridgeError as e:
+            outcomes = [e] * len(sent)
+        for (tool, _), outcome in zip(sent, outcomes):
+            if not record(tool, outcome) and stop_on_error:
+                return False
+        return True
+
+    for entry in calls:
+        tool = entry.get("tool", "")
+        try:
+            if tool not in _batch_tools:
+                raise ValueError(f"Unknown tool: {tool}")
+            fn, params = _batch_tools[tool]
+            arguments = dict(params.model_validate(entry.get("params") or {}))
+        except Exception as e:
+            outcome: Any = e
+        else:
+            if tool in _forwarded_tools:
+                queued.append((tool, _pack(**arguments)))
+                continue
+            outcome = None
+        # Calls that aren't forwarded run in order after the queued ones
+        if not await flush():
+            break
+        if outcome is None:
+            try:
+                outcome = fn(**arguments)
+                if asyncio.iscoroutine(outcome):
+                    outcome = await outcome
+            except Exception as e:
+                outcome = e
+        if not record(tool, outcome) and stop_on_error:
+            break
+    else:
+        await flush()
+    return {"results": results, "errors": errors}
 
 
 def main():
     """Run the MCP server"""
     import sys
 
+    from . import __version__
+
     print(f"当前 renderdoc-mcp 版本为 {__version__}", file=sys.stderr)
-    mcp.run()
+    try:
+        mcp.run()
+    finally:
+        bridge.close()
 
 
 if __name__ == "__main__":
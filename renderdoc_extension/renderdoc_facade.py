@@ -11,6 +11,7 @@ from .services import (
     ResourceService,
     PipelineService,
 )
+from .utils import ResourceIndex
 
 
 class RenderDocFacade:
@@ -33,18 +34,54 @@ class RenderDocFacade:
             ctx: The pyrenderdoc CaptureContext from register()
         """
         self.ctx = ctx
+        # Replay controller while inside invoke_many(), else None
+        self._controller = None
 
         # Initialize service classes
         self._capture = CaptureManager(ctx, self._invoke)
         self._action = ActionService(ctx, self._invoke)
         self._search = SearchService(ctx, self._invoke)
-        self._resource = ResourceService(ctx, self._invoke)
-        self._pipeline = PipelineService(ctx, self._invoke)
+        # Texture/buffer descriptions, shared by the resource and pipeline
+        # services so they are fetched once per capture
+        resource_index = ResourceIndex(ctx)
+        self._resource = ResourceService(ctx, self._invoke, resource_index)
+        self._pipeline = PipelineService(ctx, self._invoke, resource_index)
 
     def _invoke(self, callback):
         """Invoke callback on replay thread via BlockInvoke"""
+        if self._controller is not None:
+            # Already on the replay thread inside invoke_many()
+            callback(self._controller)
+            return
         self.ctx.Replay().BlockInvoke(callback)
 
+    def invoke_many(self, fn):
+        """
+        Run fn() on the replay thread in a single BlockInvoke.
+
+        Every service call made by fn then runs its callbacks inline instead
+        of paying a BlockInvoke hop each. fn must not load or close captures.
+        """
+        if not self.ctx.IsCaptureLoaded():
+            return fn()
+
+        result = {"value": None, "error": None}
+
+        def callback(controller):
+            self._controller = controller
+            try:
+                result["value"] = fn()
+            except Exception as e:
+                result["error"] = e
+            finally:
+                self._controller = None
+
+        self.ctx.Replay().BlockInvoke(callback)
+
+        if result["error"] is not None:
+            raise result["error"]
+        return result["value"]
+
     # ==================== Capture Management ====================
 
     def get_capture_status(self):
@@ -57,7 +94,20 @@ class RenderDocFacade:
 
     def open_capture(self, capture_path):
         """Open a capture file in RenderDoc"""
-        return self._capture.open_capture(capture_path)
+        # The file may have been rewritten since it was last indexed
+        self._search.clear_indices()
+        self._action.clear_cache()
+        self._resource.clear_cache()
+        self._pipeline.clear_cache()
+        result = self._capture.open_capture(capture_path)
+
+        # Optionally build the search index while the user is still looking
+        # at the freshly loaded capture, rather than on the first search
+        try:
+            self._search.warm_up(self.ctx.Replay())
+        except Exception as e:
+            print("[MCP Bridge] Could not start search warm-up: %s" % str(e))
+        return result
 
     # ==================== Draw Call / Action Operations ====================
 
@@ -70,6 +120,7 @@ class RenderDocFacade:
         event_id_max=None,
         only_actions=False,
         flags_filter=None,
+        compact=False,
     ):
         """Get all draw calls/actions in the capture with optional filtering"""
         return self._action.get_draw_calls(
@@ -80,6 +131,7 @@ class RenderDocFacade:
             event_id_max=event_id_max,
             only_actions=only_actions,
             flags_filter=flags_filter,
+            compact=compact,
         )
 
     def get_frame_summary(self):
@@ -116,18 +168,28 @@ class RenderDocFacade:
 
     # ==================== Resource Operations ====================
 
-    def get_buffer_contents(self, resource_id, offset=0, length=0):
+    def get_buffer_contents(self, resource_id, offset=0, length=0, raw=False):
         """Get buffer data"""
-        return self._resource.get_buffer_contents(resource_id, offset, length)
+        return self._resource.get_buffer_contents(resource_id, offset, length, raw)
 
     def get_texture_info(self, resource_id):
         """Get texture metadata"""
         return self._resource.get_texture_info(resource_id)
 
-    def get_texture_data(self, resource_id, mip=0, slice=0, sample=0, depth_slice=None):
+    def get_texture_data(
+        self,
+        resource_id,
+        mip=0,
+        slice=0,
+        sample=0,
+        depth_slice=None,
+        raw=False,
+        offset=0,
+        length=0,
+    ):
         """Get texture pixel data"""
         return self._resource.get_texture_data(
-            resource_id, mip, slice, sample, depth_slice
+            resource_id, mip, slice, sample, depth_slice, raw, offset, length
         )
 
     # ==================== Pipeline Operations ====================
@@ -3,14 +3,29 @@ Request Handler for RenderDoc MCP Bridge
 Routes incoming requests to appropriate facade methods.
 """
 
+import os
 import traceback
 
+from .socket_server import IPC_DIR
+from .utils import Helpers
+
+
+def _required(params, key):
+    """Return a required parameter, raising ValueError when it is missing"""
+    value = params.get(key)
+    if value is None:
+        raise ValueError("%s is required" % key)
+    return value
+
 
 class RequestHandler:
     """Handles incoming MCP bridge requests"""
 
     def __init__(self, facade):
         self.facade = facade
+        # Work queued by _after() for the request being handled in a batch,
+        # run once the batch's replay-thread call returns; None otherwise
+        self._pending = None
         self._methods = {
             "ping": self._handle_ping,
             "get_capture_status": self._handle_get_capture_status,
@@ -38,12 +53,13 @@ class RequestHandler:
         params = request.get("params", {})
 
         try:
-            if method not in self._methods:
+            handler = self._methods.get(method)
+            if handler is None:
                 return self._error_response(
                     request_id, -32601, "Method not found: %s" % method
                 )
 
-            result = self._methods[method](params)
+            result = handler(params)
             return {"id": request_id, "result": result}
 
         except ValueError as e:
@@ -52,6 +68,98 @@ class RequestHandler:
             traceback.print_exc()
             return self._error_response(request_id, -32000, str(e))
 
+    def handle_batch(self, requests):
+        """Handle a list of requests in order and return the list of responses"""
+        if len(requests) > 1 and not any(
+            isinstance(request, dict) and request.get("method") == "open_capture"
+            for request in requests
+        ):
+            # One replay-thread hop for the whole batch. open_capture is left
+            # out since loading a capture needs the replay thread itself.
+            # Encoding and file writes queued by the handlers run afterwards,
+            # so the replay thread is only held for the controller calls.
+            def run():
+                handled = []
+                for request in requests:
+                    self._pending = []
+                    handled.append((self.handle(request), self._pending))
+                return handled
+
+            try:
+                handled = self.facade.invoke_many(run)
+            finally:
+                self._pending = None
+            return [self._finish(response, pending) for response, pending in handled]
+        return [self.handle(request) for request in requests]
+
+    def _after(self, fn, *args):
+        """
+        Run fn(*args) to complete the current result: at once, or in a batch
+        after the replay-thread call returns.
+        """
+        if self._pending is None:
+            fn(*args)
+        else:
+            self._pending.append((fn, args))
+
+    def _finish(self, response, pending):
+        """Run the work queued for a batched response"""
+        if "error" in response:
+            return response
+        try:
+            for fn, args in pending:
+                fn(*args)
+        except ValueError as e:
+            return self._error_response(response["id"], -32602, str(e))
+        except Exception as e:
+            traceback.print_exc()
+            return self._error_response(response["id"], -32000, str(e))
+        return response
+
+    def _blob_path(self, params, key):
+        """
+        Return the side file named by params[key], or None if not given.
+
+        The client only names fresh blob files in the IPC directory, so any
+        other path is rejected rather than written to.
+        """
+        path = params.get(key)
+        if not path:
+            return None
+        path = os.path.realpath(path)
+        if os.path.normcase(os.path.dirname(path)) != os.path.normcase(
+            os.path.realpath(IPC_DIR)
+        ) or not os.path.basename(path).startswith("blob-"):
+            raise ValueError("%s must name a blob file in %s" % (key, IPC_DIR))
+        return path
+
+    def _write_blob(self, path, data):
+        """Write bytes to a side file named by the client"""
+        with open(path, "wb") as f:
+            f.write(data)
+
+    def _write_source(self, path, source, result):
+        """Write shader source to a side file and describe it in result"""
+        data = source.encode("utf-8")
+        self._write_blob(path, data)
+        result["source_size"] = len(data)
+        result["source_lines"] = source.count("\n") + 1
+
+    def _encode_content(self, result, content):
+        """Add raw content to result as base64 text"""
+        result["content_base64"] = Helpers.b64encode(content)
+
+    def _complete_content(self, result, blob_path):
+        """
+        Hand a raw result's content over: written to the blob file if the
+        client named one, else base64-encoded into the result
+        """
+        content = result.pop("content")
+        if blob_path:
+            self._after(self._write_blob, blob_path, content)
+        else:
+            self._after(self._encode_content, result, content)
+
     def _error_response(self, request_id, code, message):
         """Create an error response"""
         return {"id": request_id, "error": {"code": code, "message": message}}
@@ -73,6 +181,7 @@ class RequestHandler:
         event_id_max = params.get("event_id_max")
         only_actions = params.get("only_actions", False)
         flags_filter = params.get("flags_filter")
+        compact = params.get("compact", False)
         return self.facade.get_draw_calls(
             include_children=include_children,
             marker_filter=marker_filter,
@@ -81,6 +190,7 @@ class RequestHandler:
             event_id_max=event_id_max,
             only_actions=only_actions,
             flags_filter=flags_filter,
+            compact=compact,
         )
 
     def _handle_get_frame_summary(self, params):
@@ -89,32 +199,24 @@ class RequestHandler:
 
     def _handle_find_draws_by_shader(self, params):
         """Handle find_draws_by_shader request"""
-        shader_name = params.get("shader_name")
-        if shader_name is None:
-            raise ValueError("shader_name is required")
+        shader_name = _required(params, "shader_name")
         stage = params.get("stage")
         return self.facade.find_draws_by_shader(shader_name, stage)
 
     def _handle_find_draws_by_texture(self, params):
         """Handle find_draws_by_texture request"""
-        texture_name = params.get("texture_name")
-        if texture_name is None:
-            raise ValueError("texture_name is required")
+        texture_name = _required(params, "texture_name")
         return self.facade.find_draws_by_texture(texture_name)
 
     def _handle_find_draws_by_resource(self, params):
         """Handle find_draws_by_resource request"""
-        resource_id = params.get("resource_id")
-        if resource_id is None:
-            raise ValueError("resource_id is required")
+        resource_id = _required(params, "resource_id")
         return self.facade.find_draws_by_resource(resource_id)
 
     def _handle_get_draw_call_details(self, params):
         """Handle get_draw_call_details request"""
-        event_id = params.get("event_id")
-        if event_id is None:
-            raise ValueError("event_id is required")
-        return self.facade.get_draw_call_details(int(event_id))
+        event_id = int(_required(params, "event_id"))
+        return self.facade.get_draw_call_details(event_id)
 
     def _handle_get_action_timings(self, params):
         """Handle get_action_timings request"""
@@ -129,71 +231,77 @@ class RequestHandler:
 
     def _handle_get_shader_info(self, params):
         """Handle get_shader_info request"""
-        event_id = params.get("event_id")
-        stage = params.get("stage")
-        if event_id is None:
-            raise ValueError("event_id is required")
-        if stage is None:
-            raise ValueError("stage is required")
-        return self.facade.get_shader_info(int(event_id), stage)
+        event_id = int(_required(params, "event_id"))
+        stage = _required(params, "stage")
+        return self.facade.get_shader_info(event_id, stage)
 
     def _handle_get_shader_source(self, params):
         """Handle get_shader_source request"""
-        event_id = params.get("event_id")
-        stage = params.get("stage")
-        if event_id is None:
-            raise ValueError("event_id is required")
-        if stage is None:
-            raise ValueError("stage is required")
+        event_id = int(_required(params, "event_id"))
+        stage = _required(params, "stage")
         target = params.get("target")
-        return self.facade.get_shader_source(int(event_id), stage, target)
+        blob_path = self._blob_path(params, "source_blob")
+        result = self.facade.get_shader_source(event_id, stage, target)
+
+        if blob_path and result.get("source_code"):
+            # Hand the source over in a side file instead of the response,
+            # so it is neither escaped nor parsed on the way
+            self._after(
+                self._write_source, blob_path, result.pop("source_code"), result
+            )
+        return result
 
     def _handle_get_buffer_contents(self, params):
         """Handle get_buffer_contents request"""
-        resource_id = params.get("resource_id")
-        if resource_id is None:
-            raise ValueError("resource_id is required")
+        resource_id = _required(params, "resource_id")
         offset = params.get("offset", 0)
         length = params.get("length", 0)
-        return self.facade.get_buffer_contents(resource_id, offset, length)
+        blob_path = self._blob_path(params, "data_blob")
+        result = self.facade.get_buffer_contents(
+            resource_id, offset, length, raw=True
+        )
+        self._complete_content(result, blob_path)
+        return result
 
     def _handle_get_texture_info(self, params):
         """Handle get_texture_info request"""
-        resource_id = params.get("resource_id")
-        if resource_id is None:
-            raise ValueError("resource_id is required")
+        resource_id = _required(params, "resource_id")
         return self.facade.get_texture_info(resource_id)
 
     def _handle_get_texture_data(self, params):
         """Handle get_texture_data request"""
-        resource_id = params.get("resource_id")
-        if resource_id is None:
-            raise ValueError("resource_id is required")
+        resource_id = _required(params, "resource_id")
         mip = params.get("mip", 0)
         slice_idx = params.get("slice", 0)
         sample = params.get("sample", 0)
         depth_slice = params.get("depth_slice")  # None = full volume
-        return self.facade.get_texture_data(
-            resource_id, mip, slice_idx, sample, depth_slice
+        offset = params.get("offset", 0)
+        length = params.get("length", 0)
+        blob_path = self._blob_path(params, "data_blob")
+        result = self.facade.get_texture_data(
+            resource_id,
+            mip,
+            slice_idx,
+            sample,
+            depth_slice,
+            raw=True,
+            offset=offset,
+            length=length,
         )
+        self._complete_content(result, blob_path)
+        return result
 
     def _handle_get_pipeline_state(self, params):
         """Handle get_pipeline_state request"""
-        event_id = params.get("event_id")
-        if event_id is None:
-            raise ValueError("event_id is required")
-        return self.facade.get_pipeline_state(int(event_id))
+        event_id = int(_required(params, "event_id"))
+        return self.facade.get_pipeline_state(event_id)
 
     def _handle_list_captures(self, params):
         """Handle list_captures request"""
-        directory = params.get("directory")
-        if directory is None:
-            raise ValueError("directory is required")
+        directory = _required(params, "directory")
         return self.facade.list_captures(directory)
 
     def _handle_open_capture(self, params):
         """Handle open_capture request"""
-        capture_path = params.get("capture_path")
-        if capture_path is None:
-            raise ValueError("capture_path is required")
+        capture_path = _required(params, "capture_path")
         return self.facade.open_capture(capture_path)
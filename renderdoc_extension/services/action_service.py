@@ -4,7 +4,24 @@ Draw call / action operations service for RenderDoc.
 
 import renderdoc as rd
 
-from ..utils import Serializers, Helpers
+from ..utils import Serializers, CaptureValue, ResultCache
+
+
+_NULL_RID = rd.ResourceId.Null()
+
+_PUSH_MARKER = int(rd.ActionFlags.PushMarker)
+_MARKER = _PUSH_MARKER | int(rd.ActionFlags.SetMarker)
+
+# get_frame_summary statistics, in output order, with the ActionFlags bits
+# each one counts as plain ints
+_STAT_MASKS = (
+    ("draw_calls", int(rd.ActionFlags.Drawcall)),
+    ("dispatches", int(rd.ActionFlags.Dispatch)),
+    ("clears", int(rd.ActionFlags.Clear)),
+    ("copies", int(rd.ActionFlags.Copy)),
+    ("presents", int(rd.ActionFlags.Present)),
+    ("markers", _MARKER),
+)
 
 
 class ActionService:
@@ -13,6 +30,17 @@ class ActionService:
     def __init__(self, ctx, invoke_fn):
         self.ctx = ctx
         self._invoke = invoke_fn
+        # Action names by event id for the loaded capture. GetName goes
+        # through the structured file on every call, so names are fetched
+        # once per capture and shared across get_draw_calls requests.
+        self._names = CaptureValue(ctx, dict)
+        # get_draw_call_details results by event id
+        self._details = ResultCache(ctx)
+
+    def clear_cache(self):
+        """Drop cached results (e.g. when a capture is reopened)"""
+        self._names.clear()
+        self._details.clear()
 
     def get_draw_calls(
         self,
@@ -23,18 +51,35 @@ class ActionService:
         event_id_max=None,
         only_actions=False,
         flags_filter=None,
+        compact=False,
     ):
         """
         Get all draw calls/actions in the capture with optional filtering.
+
+        With compact=True (only valid with include_children=False) the
+        top-level actions are returned as parallel lists instead.
         """
         if not self.ctx.IsCaptureLoaded():
             raise ValueError("No capture loaded")
+        if compact and include_children:
+            raise ValueError("compact requires include_children=False")
 
         result = {"actions": []}
 
         def callback(controller):
             root_actions = controller.GetRootActions()
             structured_file = controller.GetStructuredFile()
+            if compact:
+                result["actions"] = Serializers.serialize_actions_compact(
+                    root_actions,
+                    structured_file,
+                    marker_filter=marker_filter,
+                    event_id_min=event_id_min,
+                    event_id_max=event_id_max,
+                    flags_filter=flags_filter,
+                    names=self._names.get(),
+                )
+                return
             result["actions"] = Serializers.serialize_actions(
                 root_actions,
                 structured_file,
@@ -45,6 +90,7 @@ class ActionService:
                 event_id_max=event_id_max,
                 only_actions=only_actions,
                 flags_filter=flags_filter,
+                names=self._names.get(),
             )
 
         self._invoke(callback)
@@ -64,58 +110,53 @@ class ActionService:
             structured_file = controller.GetStructuredFile()
             api = controller.GetAPIProperties().pipelineType
 
-            # Statistics counters
-            stats = {
-                "draw_calls": 0,
-                "dispatches": 0,
-                "clears": 0,
-                "copies": 0,
-                "presents": 0,
-                "markers": 0,
-            }
-            total_actions = [0]
-
-            def count_actions(actions):
-                for action in actions:
-                    total_actions[0] += 1
-                    flags = action.flags
-
-                    if flags & rd.ActionFlags.Drawcall:
-                        stats["draw_calls"] += 1
-                    if flags & rd.ActionFlags.Dispatch:
-                        stats["dispatches"] += 1
-                    if flags & rd.ActionFlags.Clear:
-                        stats["clears"] += 1
-                    if flags & rd.ActionFlags.Copy:
-                        stats["copies"] += 1
-                    if flags & rd.ActionFlags.Present:
-                        stats["presents"] += 1
-                    if flags & (rd.ActionFlags.PushMarker | rd.ActionFlags.SetMarker):
-                        stats["markers"] += 1
-
-                    if action.children:
-                        count_actions(action.children)
-
-            count_actions(root_actions)
-
-            # Top-level markers
+            # Number of actions per distinct flags value. A capture only uses
+            # a handful of flag combinations, so the per-category counts are
+            # resolved from this histogram afterwards instead of testing six
+            # masks on every action.
+            flag_counts = {}
+            total_actions = 0
             top_markers = []
-            for action in root_actions:
-                if action.flags & rd.ActionFlags.PushMarker:
-                    child_count = Helpers.count_children(action)
+
+            # One pass per top-level action, over its subtree with an explicit
+            # stack; the subtree size doubles as a top-level marker's child
+            # count
+            for root in root_actions:
+                subtree_size = 0
+                stack = [root]
+                while stack:
+                    action = stack.pop()
+                    subtree_size += 1
+                    flags = int(action.flags)
+                    flag_counts[flags] = flag_counts.get(flags, 0) + 1
+
+                    children = action.children
+                    if children:
+                        stack.extend(children)
+
+                total_actions += subtree_size
+
+                # Top-level markers
+                if int(root.flags) & _PUSH_MARKER:
                     top_markers.append({
-                        "name": action.GetName(structured_file),
-                        "event_id": action.eventId,
-                        "child_count": child_count,
+                        "name": root.GetName(structured_file),
+                        "event_id": root.eventId,
+                        "child_count": subtree_size - 1,
                     })
 
+            stats = {}
+            for name, mask in _STAT_MASKS:
+                stats[name] = sum(
+                    count for flags, count in flag_counts.items() if flags & mask
+                )
+
             # Resource counts
             textures = controller.GetTextures()
             buffers = controller.GetBuffers()
 
             result["summary"] = {
                 "api": str(api),
-                "total_actions": total_actions[0],
+                "total_actions": total_actions,
                 "statistics": stats,
                 "top_level_markers": top_markers,
                 "resource_counts": {
@@ -132,12 +173,15 @@ class ActionService:
         if not self.ctx.IsCaptureLoaded():
             raise ValueError("No capture loaded")
 
+        cached = self._details.get(event_id)
+        if cached is not None:
+            return cached
+
         result = {"details": None, "error": None}
 
         def callback(controller):
-            # Move to the event
-            controller.SetFrameEvent(event_id, True)
-
+            # Everything here comes from the action list, so there is no
+            # need to replay to the event
             action = self.ctx.GetAction(event_id)
             if not action:
                 result["error"] = "No action at event %d" % event_id
@@ -159,14 +203,15 @@ class ActionService:
             }
 
             # Output resources
-            outputs = []
-            for i, output in enumerate(action.outputs):
-                if output != rd.ResourceId.Null():
-                    outputs.append({"index": i, "resource_id": str(output)})
-            details["outputs"] = outputs
+            details["outputs"] = [
+                {"index": i, "resource_id": str(output)}
+                for i, output in enumerate(action.outputs)
+                if output != _NULL_RID
+            ]
 
-            if action.depthOut != rd.ResourceId.Null():
-                details["depth_output"] = str(action.depthOut)
+            depth_out = action.depthOut
+            if depth_out != _NULL_RID:
+                details["depth_output"] = str(depth_out)
 
             result["details"] = details
 
@@ -174,6 +219,7 @@ class ActionService:
 
         if result["error"]:
             raise ValueError(result["error"])
+        self._details.put(event_id, result["details"])
         return result["details"]
 
     def get_action_timings(
@@ -246,8 +292,7 @@ class ActionService:
                     current_markers = parent_markers[:]
 
                     # Track marker hierarchy
-                    is_marker = bool(action.flags & (rd.ActionFlags.PushMarker | rd.ActionFlags.SetMarker))
-                    if is_marker:
+                    if int(action.flags) & _MARKER:
                         current_markers.append(action_name)
 
                     # Apply marker filter
@@ -55,16 +55,17 @@ class CaptureManager:
         captures = []
 
         try:
-            for filename in os.listdir(directory):
-                if filename.lower().endswith(".rdc"):
-                    filepath = os.path.join(directory, filename)
-                    if os.path.isfile(filepath):
-                        stat = os.stat(filepath)
+            # scandir reports each entry's type with the listing, and on
+            # Windows its stat too, so most entries need no further syscalls
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.lower().endswith(".rdc") and entry.is_file():
+                        stat = entry.stat()
                         # Format timestamp as ISO 8601
                         mtime = datetime.datetime.fromtimestamp(stat.st_mtime)
                         captures.append({
-                            "filename": filename,
-                            "path": filepath,
+                            "filename": entry.name,
+                            "path": entry.path,
                             "size_bytes": stat.st_size,
                             "modified_time": mtime.isoformat(),
                         })
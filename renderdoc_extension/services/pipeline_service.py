@@ -4,31 +4,76 @@ Pipeline state service for RenderDoc.
 
 import renderdoc as rd
 
-from ..utils import Parsers, Serializers, Helpers
+from ..utils import (
+    Parsers,
+    Serializers,
+    Helpers,
+    ResourceIndex,
+    ResultCache,
+    capture_filename,
+)
+
+
+_NULL_RID = rd.ResourceId.Null()
+
+# Shader stages with their result keys, resolved once
+_STAGES = tuple((s, str(s)) for s in Helpers.get_all_shader_stages())
+
+
+def _bind_names(bindings):
+    """Map reflected resources' bind numbers to their names"""
+    return {b.fixedBindNumber: b.name for b in bindings}
+
+
+def _move_to_event(controller, event_id):
+    """
+    Select an event for inspection. Nothing here modifies the capture, so
+    the replay is not forced when the controller is already at the event.
+    """
+    controller.SetFrameEvent(event_id, False)
 
 
 class PipelineService:
     """Pipeline state service"""
 
-    def __init__(self, ctx, invoke_fn):
+    def __init__(self, ctx, invoke_fn, resource_index=None):
         self.ctx = ctx
         self._invoke = invoke_fn
+        # (textures, buffers) descriptions by ResourceId, possibly shared
+        # with other services
+        self._resource_index = resource_index or ResourceIndex(ctx)
+        # get_shader_info / get_pipeline_state results by (method, args)
+        self._results = ResultCache(ctx)
+        # Disassembly text by (shader, pipeline object, target); many events
+        # share a shader, and disassembling it is deterministic
+        self._disassembly = ResultCache(ctx)
+
+    def clear_cache(self):
+        """Drop cached results (e.g. when a capture is reopened)"""
+        self._resource_index.clear()
+        self._results.clear()
+        self._disassembly.clear()
 
     def get_shader_info(self, event_id, stage):
         """Get shader information for a specific stage"""
         if not self.ctx.IsCaptureLoaded():
             raise ValueError("No capture loaded")
 
+        key = ("shader_info", event_id, stage)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
         result = {"shader": None, "error": None}
 
         def callback(controller):
-            controller.SetFrameEvent(event_id, True)
+            _move_to_event(controller, event_id)
 
             pipe = controller.GetPipelineState()
             stage_enum = Parsers.parse_stage(stage)
 
             shader = pipe.GetShader(stage_enum)
-            if shader == rd.ResourceId.Null():
+            if shader == _NULL_RID:
                 result["error"] = "No %s shader bound" % stage
                 return
 
@@ -59,8 +104,12 @@ class PipelineService:
                     # Pick the best readable target
                     best_target = self._pick_best_disassembly_target(targets)
                     shader_info["disassembly_target_used"] = best_target
-                    disasm = controller.DisassembleShader(
-                        pipe.GetGraphicsPipelineObject(), reflection, best_target
+                    disasm = self._disassemble(
+                        controller,
+                        pipe.GetGraphicsPipelineObject(),
+                        shader,
+                        reflection,
+                        best_target,
                     )
                     shader_info["disassembly"] = disasm
             except Exception as e:
@@ -79,6 +128,7 @@ class PipelineService:
 
         if result["error"]:
             raise ValueError(result["error"])
+        self._results.put(key, result["shader"])
         return result["shader"]
 
     @staticmethod
@@ -210,6 +260,15 @@ class PipelineService:
         # Fallback: first target
         return targets[0]
 
+    def _disassemble(self, controller, pipeline_obj, shader, reflection, target):
+        """Disassemble a shader, reusing earlier results for the capture"""
+        key = (shader, pipeline_obj, target)
+        code = self._disassembly.get(key)
+        if code is None:
+            code = controller.DisassembleShader(pipeline_obj, reflection, target)
+            self._disassembly.put(key, code)
+        return code
+
     def get_shader_source(self, event_id, stage, target=None):
         """Get decompiled/disassembled shader source code.
 
@@ -229,13 +288,13 @@ class PipelineService:
         result = {"source": None, "error": None}
 
         def callback(controller):
-            controller.SetFrameEvent(event_id, True)
+            _move_to_event(controller, event_id)
 
             pipe = controller.GetPipelineState()
             stage_enum = Parsers.parse_stage(stage)
 
             shader = pipe.GetShader(stage_enum)
-            if shader == rd.ResourceId.Null():
+            if shader == _NULL_RID:
                 result["error"] = "No %s shader bound" % stage
                 return
 
@@ -286,8 +345,8 @@ class PipelineService:
                         return
                     chosen = matching[0]
                     try:
-                        code = controller.DisassembleShader(
-                            pipeline_obj, reflection, chosen
+                        code = self._disassemble(
+                            controller, pipeline_obj, shader, reflection, chosen
                         )
                         # Only overwrite if we got valid disassembly
                         if code and not code.startswith("[Error"):
@@ -306,8 +365,8 @@ class PipelineService:
 
                     for t in targets:
                         try:
-                            code = controller.DisassembleShader(
-                                pipeline_obj, reflection, t
+                            code = self._disassemble(
+                                controller, pipeline_obj, shader, reflection, t
                             )
                             all_sources[t] = code
                         except Exception as e:
@@ -335,12 +394,7 @@ class PipelineService:
                                     break
 
             except Exception as e:
-                import traceback
-
-                source_info["error"] = "Disassembly error: %s\n%s" % (
-                    str(e),
-                    traceback.format_exc(),
-                )
+                source_info["error"] = Helpers.format_error("Disassembly error", e)
 
             result["source"] = source_info
 
@@ -348,6 +402,9 @@ class PipelineService:
 
         if result["error"]:
             raise ValueError(result["error"])
+        # Lets the client name its output after the capture the source came
+        # from without asking for the capture status separately
+        result["source"]["capture_filename"] = capture_filename(self.ctx) or ""
         return result["source"]
 
     def get_pipeline_state(self, event_id):
@@ -355,10 +412,15 @@ class PipelineService:
         if not self.ctx.IsCaptureLoaded():
             raise ValueError("No capture loaded")
 
+        key = ("pipeline_state", event_id)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+
         result = {"pipeline": None, "error": None}
 
         def callback(controller):
-            controller.SetFrameEvent(event_id, True)
+            _move_to_event(controller, event_id)
 
             pipe = controller.GetPipelineState()
             api = controller.GetAPIProperties().pipelineType
@@ -368,12 +430,16 @@ class PipelineService:
                 "api": str(api),
             }
 
-            # Shader stages with detailed bindings
+            # Shader stages with detailed bindings. Resource details are
+            # looked up once per resource; the same texture is often bound
+            # to several stages. Descriptions come from the per-capture
+            # ResourceId-keyed dicts rather than a scan per resource.
             stages = {}
-            stage_list = Helpers.get_all_shader_stages()
-            for stage in stage_list:
+            details_cache = {}
+            resource_index = self._resource_index.get(controller)
+            for stage, stage_name in _STAGES:
                 shader = pipe.GetShader(stage)
-                if shader != rd.ResourceId.Null():
+                if shader != _NULL_RID:
                     stage_info = {
                         "resource_id": str(shader),
                         "entry_point": pipe.GetShaderEntryPoint(stage),
@@ -382,10 +448,12 @@ class PipelineService:
                     reflection = pipe.GetShaderReflection(stage)
 
                     stage_info["resources"] = self._get_stage_resources(
-                        controller, pipe, stage, reflection
+                        controller, pipe, stage, reflection,
+                        details_cache, resource_index,
                     )
                     stage_info["uavs"] = self._get_stage_uavs(
-                        controller, pipe, stage, reflection
+                        controller, pipe, stage, reflection,
+                        details_cache, resource_index,
                     )
                     stage_info["samplers"] = self._get_stage_samplers(
                         pipe, stage, reflection
@@ -394,7 +462,7 @@ class PipelineService:
                         controller, pipe, stage, reflection
                     )
 
-                    stages[str(stage)] = stage_info
+                    stages[stage_name] = stage_info
 
             pipeline_info["shaders"] = stages
 
@@ -402,19 +470,17 @@ class PipelineService:
             try:
                 vp_scissor = pipe.GetViewportScissor()
                 if vp_scissor:
-                    viewports = []
-                    for v in vp_scissor.viewports:
-                        viewports.append(
-                            {
-                                "x": v.x,
-                                "y": v.y,
-                                "width": v.width,
-                                "height": v.height,
-                                "min_depth": v.minDepth,
-                                "max_depth": v.maxDepth,
-                            }
-                        )
-                    pipeline_info["viewports"] = viewports
+                    pipeline_info["viewports"] = [
+                        {
+                            "x": v.x,
+                            "y": v.y,
+                            "width": v.width,
+                            "height": v.height,
+                            "min_depth": v.minDepth,
+                            "max_depth": v.maxDepth,
+                        }
+                        for v in vp_scissor.viewports
+                    ]
             except Exception:
                 pass
 
@@ -422,14 +488,16 @@ class PipelineService:
             try:
                 om = pipe.GetOutputMerger()
                 if om:
-                    rts = []
-                    for i, rt in enumerate(om.renderTargets):
-                        if rt.resourceId != rd.ResourceId.Null():
-                            rts.append({"index": i, "resource_id": str(rt.resourceId)})
-                    pipeline_info["render_targets"] = rts
-
-                    if om.depthTarget.resourceId != rd.ResourceId.Null():
-                        pipeline_info["depth_target"] = str(om.depthTarget.resourceId)
+                    rt_ids = [rt.resourceId for rt in om.renderTargets]
+                    pipeline_info["render_targets"] = [
+                        {"index": i, "resource_id": str(rid)}
+                        for i, rid in enumerate(rt_ids)
+                        if rid != _NULL_RID
+                    ]
+
+                    depth_id = om.depthTarget.resourceId
+                    if depth_id != _NULL_RID:
+                        pipeline_info["depth_target"] = str(depth_id)
             except Exception:
                 pass
 
@@ -437,7 +505,9 @@ class PipelineService:
             try:
                 ia = pipe.GetIAState()
                 if ia:
-                    pipeline_info["input_assembly"] = {"topology": str(ia.topology)}
+                    pipeline_info["input_assembly"] = {
+                        "topology": Helpers.enum_str(ia.topology)
+                    }
             except Exception:
                 pass
 
@@ -447,38 +517,48 @@ class PipelineService:
 
         if result["error"]:
             raise ValueError(result["error"])
+        self._results.put(key, result["pipeline"])
         return result["pipeline"]
 
-    def _get_stage_resources(self, controller, pipe, stage, reflection):
+    def _get_stage_resources(
+        self, controller, pipe, stage, reflection, details_cache=None,
+        resource_index=None,
+    ):
         """Get shader resource views (SRVs) for a stage"""
         resources = []
         try:
             srvs = pipe.GetReadOnlyResources(stage, False)
 
-            name_map = {}
-            if reflection:
-                for res in reflection.readOnlyResources:
-                    name_map[res.fixedBindNumber] = res.name
+            # Reflection is only walked when something is bound
+            name_map = _bind_names(
+                reflection.readOnlyResources if reflection and srvs else ()
+            )
 
             for srv in srvs:
-                if srv.descriptor.resource == rd.ResourceId.Null():
+                # Each descriptor access copies the struct out of C++
+                descriptor = srv.descriptor
+                rid = descriptor.resource
+                if rid == _NULL_RID:
                     continue
 
                 slot = srv.access.index
                 res_info = {
                     "slot": slot,
                     "name": name_map.get(slot, ""),
-                    "resource_id": str(srv.descriptor.resource),
+                    "resource_id": str(rid),
                 }
 
                 res_info.update(
-                    self._get_resource_details(controller, srv.descriptor.resource)
+                    self._get_resource_details(
+                        controller, rid, details_cache,
+                        resource_index,
+                    )
                 )
 
-                res_info["first_mip"] = srv.descriptor.firstMip
-                res_info["num_mips"] = srv.descriptor.numMips
-                res_info["first_slice"] = srv.descriptor.firstSlice
-                res_info["num_slices"] = srv.descriptor.numSlices
+                res_info["first_mip"] = descriptor.firstMip
+                res_info["num_mips"] = descriptor.numMips
+                res_info["first_slice"] = descriptor.firstSlice
+                res_info["num_slices"] = descriptor.numSlices
 
                 resources.append(res_info)
         except Exception as e:
@@ -486,34 +566,43 @@ class PipelineService:
 
         return resources
 
-    def _get_stage_uavs(self, controller, pipe, stage, reflection):
+    def _get_stage_uavs(
+        self, controller, pipe, stage, reflection, details_cache=None,
+        resource_index=None,
+    ):
         """Get unordered access views (UAVs) for a stage"""
         uavs = []
         try:
             uav_list = pipe.GetReadWriteResources(stage, False)
 
-            name_map = {}
-            if reflection:
-                for res in reflection.readWriteResources:
-                    name_map[res.fixedBindNumber] = res.name
+            # Reflection is only walked when something is bound
+            name_map = _bind_names(
+                reflection.readWriteResources if reflection and uav_list else ()
+            )
 
             for uav in uav_list:
-                if uav.descriptor.resource == rd.ResourceId.Null():
+                # Each descriptor access copies the struct out of C++
+                descriptor = uav.descriptor
+                rid = descriptor.resource
+                if rid == _NULL_RID:
                     continue
 
                 slot = uav.access.index
                 uav_info = {
                     "slot": slot,
                     "name": name_map.get(slot, ""),
-                    "resource_id": str(uav.descriptor.resource),
+                    "resource_id": str(rid),
                 }
 
                 uav_info.update(
-                    self._get_resource_details(controller, uav.descriptor.resource)
+                    self._get_resource_details(
+                        controller, rid, details_cache,
+                        resource_index,
+                    )
                 )
 
-                uav_info["first_element"] = uav.descriptor.firstMip
-                uav_info["num_elements"] = uav.descriptor.numMips
+                uav_info["first_element"] = descriptor.firstMip
+                uav_info["num_elements"] = descriptor.numMips
 
                 uavs.append(uav_info)
         except Exception as e:
@@ -527,10 +616,10 @@ class PipelineService:
         try:
             sampler_list = pipe.GetSamplers(stage, False)
 
-            name_map = {}
-            if reflection:
-                for samp in reflection.samplers:
-                    name_map[samp.fixedBindNumber] = samp.name
+            # Reflection is only walked when something is bound
+            name_map = _bind_names(
+                reflection.samplers if reflection and sampler_list else ()
+            )
 
             for samp in sampler_list:
                 slot = samp.access.index
@@ -541,9 +630,9 @@ class PipelineService:
 
                 desc = samp.descriptor
                 try:
-                    samp_info["address_u"] = str(desc.addressU)
-                    samp_info["address_v"] = str(desc.addressV)
-                    samp_info["address_w"] = str(desc.addressW)
+                    samp_info["address_u"] = Helpers.enum_str(desc.addressU)
+                    samp_info["address_v"] = Helpers.enum_str(desc.addressV)
+                    samp_info["address_w"] = Helpers.enum_str(desc.addressW)
                 except AttributeError:
                     pass
 
@@ -575,7 +664,7 @@ class PipelineService:
                     pass
 
                 try:
-                    samp_info["compare_function"] = str(desc.compareFunction)
+                    samp_info["compare_function"] = Helpers.enum_str(desc.compareFunction)
                 except AttributeError:
                     pass
 
@@ -617,8 +706,30 @@ class PipelineService:
 
         return cbuffers
 
-    def _get_resource_details(self, controller, resource_id):
-        """Get details about a resource (texture or buffer)"""
+    def _get_resource_details(
+        self, controller, resource_id, cache=None, resource_index=None
+    ):
+        """
+        Get details about a resource (texture or buffer).
+
+        Args:
+            cache: Optional dict of details by resource, shared across calls
+            resource_index: Optional (textures, buffers) from the
+                ResourceIndex
+        """
+        if cache is None:
+            return self._lookup_resource_details(
+                controller, resource_id, resource_index
+            )
+        details = cache.get(resource_id)
+        if details is None:
+            details = cache[resource_id] = self._lookup_resource_details(
+                controller, resource_id, resource_index
+            )
+        return details
+
+    def _lookup_resource_details(self, controller, resource_id, resource_index=None):
+        """Resolve a resource's name and texture/buffer description"""
         details = {}
 
         try:
@@ -628,24 +739,27 @@ class PipelineService:
         except Exception:
             pass
 
-        for tex in controller.GetTextures():
-            if tex.resourceId == resource_id:
-                details["type"] = "texture"
-                details["width"] = tex.width
-                details["height"] = tex.height
-                details["depth"] = tex.depth
-                details["array_size"] = tex.arraysize
-                details["mip_levels"] = tex.mips
-                details["format"] = str(tex.format.Name())
-                details["dimension"] = str(tex.type)
-                details["msaa_samples"] = tex.msSamp
-                return details
-
-        for buf in controller.GetBuffers():
-            if buf.resourceId == resource_id:
-                details["type"] = "buffer"
-                details["length"] = buf.length
-                return details
+        if resource_index is None:
+            resource_index = self._resource_index.get(controller)
+        textures, buffers = resource_index
+
+        tex = textures.get(resource_id)
+        if tex is not None:
+            details["type"] = "texture"
+            details["width"] = tex.width
+            details["height"] = tex.height
+            details["depth"] = tex.depth
+            details["array_size"] = tex.arraysize
+            details["mip_levels"] = tex.mips
+            details["format"] = str(tex.format.Name())
+            details["dimension"] = Helpers.enum_str(tex.type)
+            details["msaa_samples"] = tex.msSamp
+            return details
+
+        buf = buffers.get(resource_id)
+        if buf is not None:
+            details["type"] = "buffer"
+            details["length"] = buf.length
 
         return details
 
@@ -663,7 +777,7 @@ class PipelineService:
 
             try:
                 bind = pipe.GetConstantBuffer(stage, i, 0)
-                if bind.resourceId != rd.ResourceId.Null():
+                if bind.resourceId != _NULL_RID:
                     variables = controller.GetCBufferVariableContents(
                         pipe.GetGraphicsPipelineObject(),
                         reflection.resourceId,
@@ -691,7 +805,7 @@ class PipelineService:
                 resources.append(
                     {
                         "name": res.name,
-                        "type": str(res.resType),
+                        "type": Helpers.enum_str(res.resType),
                         "binding": res.fixedBindNumber,
                         "access": "ReadOnly",
                     }
@@ -704,7 +818,7 @@ class PipelineService:
                 resources.append(
                     {
                         "name": res.name,
-                        "type": str(res.resType),
+                        "type": Helpers.enum_str(res.resType),
                         "binding": res.fixedBindNumber,
                         "access": "ReadWrite",
                     }
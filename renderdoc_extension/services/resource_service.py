@@ -2,32 +2,32 @@
 Resource information service for RenderDoc.
 """
 
-import base64
-
 import renderdoc as rd
 
-from ..utils import Parsers
+from ..utils import Parsers, Helpers, ResourceIndex
 
 
 class ResourceService:
     """Resource information service"""
 
-    def __init__(self, ctx, invoke_fn):
+    def __init__(self, ctx, invoke_fn, resource_index=None):
         self.ctx = ctx
         self._invoke = invoke_fn
+        # (textures, buffers) descriptions by ResourceId, possibly shared
+        # with other services
+        self._resource_index = resource_index or ResourceIndex(ctx)
+
+    def clear_cache(self):
+        """Drop cached resource descriptions (e.g. when a capture is reopened)"""
+        self._resource_index.clear()
 
     def _find_texture_by_id(self, controller, resource_id):
         """Find texture by resource ID"""
-        target_id = Parsers.extract_numeric_id(resource_id)
-        for tex in controller.GetTextures():
-            tex_id_str = str(tex.resourceId)
-            tex_id = Parsers.extract_numeric_id(tex_id_str)
-            if tex_id == target_id:
-                return tex
-        return None
-
-    def get_buffer_contents(self, resource_id, offset=0, length=0):
-        """Get buffer data"""
+        rid = Parsers.parse_resource_id(resource_id)
+        return self._resource_index.get(controller)[0].get(rid)
+
+    def get_buffer_contents(self, resource_id, offset=0, length=0, raw=False):
+        """Get buffer data (as bytes under "content" if raw, else base64)"""
         if not self.ctx.IsCaptureLoaded():
             raise ValueError("No capture loaded")
 
@@ -42,11 +42,7 @@ class ResourceService:
                 return
 
             # Find buffer
-            buf_desc = None
-            for buf in controller.GetBuffers():
-                if buf.resourceId == rid:
-                    buf_desc = buf
-                    break
+            buf_desc = self._resource_index.get(controller)[1].get(rid)
 
             if not buf_desc:
                 result["error"] = "Buffer not found: %s" % resource_id
@@ -61,14 +57,19 @@ class ResourceService:
                 "length": len(data),
                 "total_size": buf_desc.length,
                 "offset": offset,
-                "content_base64": base64.b64encode(data).decode("ascii"),
             }
+            result["data"]["content"] = data
 
         self._invoke(callback)
 
         if result["error"]:
             raise ValueError(result["error"])
-        return result["data"]
+        data = result["data"]
+        if not raw:
+            # Encoded here rather than in the callback, so the replay thread
+            # is free again while the text is built
+            data["content_base64"] = Helpers.b64encode(data.pop("content"))
+        return data
 
     def get_texture_info(self, resource_id):
         """Get texture metadata"""
@@ -98,8 +99,7 @@ class ResourceService:
                     "byte_size": tex_desc.byteSize,
                 }
             except Exception as e:
-                import traceback
-                result["error"] = "Error: %s\n%s" % (str(e), traceback.format_exc())
+                result["error"] = Helpers.format_error("Error", e)
 
         self._invoke(callback)
 
@@ -107,8 +107,18 @@ class ResourceService:
             raise ValueError(result["error"])
         return result["texture"]
 
-    def get_texture_data(self, resource_id, mip=0, slice=0, sample=0, depth_slice=None):
-        """Get texture pixel data."""
+    def get_texture_data(
+        self,
+        resource_id,
+        mip=0,
+        slice=0,
+        sample=0,
+        depth_slice=None,
+        raw=False,
+        offset=0,
+        length=0,
+    ):
+        """Get texture pixel data (as a buffer under "content" if raw, else base64)."""
         if not self.ctx.IsCaptureLoaded():
             raise ValueError("No capture loaded")
 
@@ -148,13 +158,15 @@ class ResourceService:
                 )
                 return
 
-            # Calculate dimensions at this mip level
-            mip_width = max(1, tex_desc.width >> mip)
-            mip_height = max(1, tex_desc.height >> mip)
-            mip_depth = max(1, tex_desc.depth >> mip)
+            # Calculate dimensions at this mip level; sizes and mip are
+            # non-negative, so "or 1" clamps to 1 like max() would
+            depth = tex_desc.depth
+            mip_width = (tex_desc.width >> mip) or 1
+            mip_height = (tex_desc.height >> mip) or 1
+            mip_depth = (depth >> mip) or 1
 
             # Validate depth_slice for 3D textures
-            is_3d = tex_desc.depth > 1
+            is_3d = depth > 1
             if depth_slice is not None:
                 if not is_3d:
                     result["error"] = "depth_slice can only be used with 3D textures"
@@ -180,7 +192,10 @@ class ResourceService:
                 result["error"] = "Failed to get texture data: %s" % str(e)
                 return
 
-            # Extract depth slice for 3D textures if requested
+            # Extract depth slice for 3D textures if requested. Slices and
+            # byte ranges are taken as views, so the (possibly whole-volume)
+            # data is not copied before it is encoded or written out.
+            data = memoryview(data)
             output_depth = mip_depth
             if is_3d and depth_slice is not None:
                 total_size = len(data)
@@ -190,6 +205,19 @@ class ResourceService:
                 data = data[slice_start:slice_end]
                 output_depth = 1
 
+            # Return only the requested byte range (0 length = to the end),
+            # so large textures can be read a piece at a time
+            full_size = len(data)
+            if offset < 0 or offset > full_size:
+                result["error"] = "Invalid offset %d (data is %d bytes)" % (
+                    offset,
+                    full_size,
+                )
+                return
+            if offset or length > 0:
+                end = offset + length if length > 0 else full_size
+                data = data[offset:end]
+
             result["data"] = {
                 "resource_id": resource_id,
                 "width": mip_width,
@@ -204,11 +232,19 @@ class ResourceService:
                 "is_3d": is_3d,
                 "total_depth": mip_depth if is_3d else 1,
                 "data_length": len(data),
-                "content_base64": base64.b64encode(data).decode("ascii"),
+                "offset": offset,
+                "total_size": full_size,
             }
+            result["data"]["content"] = data
 
         self._invoke(callback)
 
         if result["error"]:
             raise ValueError(result["error"])
-        return result["data"]
+        data = result["data"]
+        if not raw:
+            # Encoded here rather than in the callback, so the replay thread
+            # is free again while the text is built. content is the only
+            # reference to the texture's pixels now.
+            data["content_base64"] = Helpers.b64encode(data.pop("content"))
+        return data
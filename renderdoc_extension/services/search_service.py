@@ -2,9 +2,188 @@
 Reverse lookup search service for RenderDoc.
 """
 
+import os
+
 import renderdoc as rd
 
-from ..utils import Parsers, Helpers
+from ..utils import Parsers, Helpers, capture_filename
+
+
+# Set RENDERDOC_MCP_WARM_UP=1 in RenderDoc's environment to build the search
+# index in the background after open_capture instead of on the first search.
+# Off by default: the scan moves the replay through every draw while the user
+# may be working in the UI.
+_WARM_UP = os.environ.get("RENDERDOC_MCP_WARM_UP", "").lower() in ("1", "true", "yes")
+
+# Draws recorded per replay-thread job while warming up the search index
+_WARM_UP_CHUNK = 64
+
+# Shader stages with their names as used in match reasons, resolved once;
+# str() of a ShaderStage is comparatively expensive
+_STAGE_NAMES = dict((s, str(s)) for s in Helpers.get_all_shader_stages())
+_STAGES = tuple(_STAGE_NAMES.items())
+
+_NULL_RID = rd.ResourceId.Null()
+
+_DRAW_OR_DISPATCH = int(rd.ActionFlags.Drawcall | rd.ActionFlags.Dispatch)
+
+
+class _SubstringIndex(object):
+    """
+    Case-insensitive substring lookup over a fixed set of names.
+
+    Names are indexed by their 3-character substrings; a query only checks
+    the names containing every trigram of the query.
+    """
+
+    def __init__(self, items):
+        """
+        Args:
+            items: Iterable of (name, value) pairs
+        """
+        self._values = {}
+        for name, value in items:
+            self._values.setdefault(name.lower(), []).append(value)
+        self._trigrams = {}
+        for key in self._values:
+            for i in range(len(key) - 2):
+                self._trigrams.setdefault(key[i:i + 3], set()).add(key)
+
+    def find(self, query):
+        """Return the set of values whose name contains query"""
+        query = query.lower()
+        if len(query) < 3:
+            keys = self._values
+        else:
+            sets = []
+            for i in range(len(query) - 2):
+                keys = self._trigrams.get(query[i:i + 3])
+                if not keys:
+                    return set()
+                sets.append(keys)
+            sets.sort(key=len)
+            keys = sets[0].intersection(*sets[1:])
+
+        found = set()
+        for key in keys:
+            if query in key:
+                found.update(self._values[key])
+        return found
+
+
+class _DrawScan(object):
+    """
+    Records the bindings of every draw, walking the frame once.
+
+    The walk can be split over several replay-thread jobs; run() continues
+    where the last call stopped. The finished index is a dict with:
+        draws: List of (event_id, name, shaders, bindings) in event order.
+            shaders lists (stage_name, shader_id, entry_point) for each bound
+            shader, with entry_point None when there is no reflection.
+            bindings lists (kind, stage_name, slot, resource_id) for SRVs and
+            UAVs by stage, then render targets and the depth target.
+        names: Resource name by ResourceId for every bound resource
+    """
+
+    def __init__(self, ctx, controller):
+        self.ctx = ctx
+        self.index = {"draws": [], "names": {}}
+        self._structured_file = controller.GetStructuredFile()
+        self._actions = [
+            a for a in Helpers.iter_actions(controller.GetRootActions())
+            if int(a.flags) & _DRAW_OR_DISPATCH
+        ]
+        # Visit draws in event order so each SetFrameEvent only replays
+        # forward from the previous draw
+        self._actions.sort(key=lambda a: a.eventId)
+        self._next = 0
+
+    @property
+    def done(self):
+        """Whether every draw has been recorded"""
+        return self._next >= len(self._actions)
+
+    def run(self, controller, limit=None):
+        """
+        Record up to limit more draws (all remaining if None).
+
+        Must run on the replay thread. Returns True once every draw is done,
+        after moving the replay back to the event selected in the UI.
+        """
+        end = len(self._actions)
+        if limit is not None:
+            end = min(end, self._next + limit)
+        if self._next >= end:
+            return self.done
+        while self._next < end:
+            action = self._actions[self._next]
+            self._next += 1
+            self._record(controller, action)
+        if self.done:
+            controller.SetFrameEvent(self.ctx.CurEvent(), False)
+        return self.done
+
+    def _add_name(self, rid):
+        """Look up a resource's name once"""
+        names = self.index["names"]
+        if rid not in names:
+            try:
+                names[rid] = self.ctx.GetResourceName(rid)
+            except Exception:
+                names[rid] = ""
+
+    def _record(self, controller, action):
+        """Record the shaders and resources bound at one draw"""
+        controller.SetFrameEvent(action.eventId, False)
+        pipe = controller.GetPipelineState()
+
+        shaders = []
+        for stage, stage_name in _STAGES:
+            shader = pipe.GetShader(stage)
+            if shader == _NULL_RID:
+                continue
+            entry_point = None
+            if pipe.GetShaderReflection(stage):
+                entry_point = pipe.GetShaderEntryPoint(stage)
+            shaders.append((stage_name, shader, entry_point))
+            self._add_name(shader)
+
+        bindings = []
+        for stage, stage_name in _STAGES:
+            try:
+                for srv in pipe.GetReadOnlyResources(stage, False):
+                    bindings.append(
+                        ("SRV", stage_name, srv.access.index,
+                         srv.descriptor.resource)
+                    )
+            except Exception:
+                pass
+            try:
+                for uav in pipe.GetReadWriteResources(stage, False):
+                    bindings.append(
+                        ("UAV", stage_name, uav.access.index,
+                         uav.descriptor.resource)
+                    )
+            except Exception:
+                pass
+        try:
+            om = pipe.GetOutputMerger()
+            if om:
+                for i, rt in enumerate(om.renderTargets):
+                    bindings.append(("RenderTarget", None, i, rt.resourceId))
+                bindings.append(
+                    ("DepthTarget", None, None, om.depthTarget.resourceId)
+                )
+        except Exception:
+            pass
+        bindings = [b for b in bindings if b[3] != _NULL_RID]
+        for binding in bindings:
+            self._add_name(binding[3])
+
+        self.index["draws"].append(
+            (action.eventId, action.GetName(self._structured_file),
+             shaders, bindings)
+        )
 
 
 class SearchService:
@@ -13,178 +192,208 @@ class SearchService:
     def __init__(self, ctx, invoke_fn):
         self.ctx = ctx
         self._invoke = invoke_fn
+        # Per-capture search indices by name, dropped when the capture changes
+        self._indices = {}
+        self._indices_capture = None
+        # Draw scan started by warm_up() and not yet finished
+        self._scan = None
 
-    def _search_draws(self, matcher_fn):
+    def clear_indices(self):
+        """Drop all search indices (e.g. when a capture is reopened)"""
+        self._indices = {}
+        self._indices_capture = None
+        self._scan = None
+
+    def _get_index(self, name, build_fn):
         """
-        Common template for searching draw calls.
+        Return a search index for the loaded capture, building it on first use.
 
         Args:
-            matcher_fn: Function(pipe, controller, action, ctx) -> match_reason or None
+            name: Index name
+            build_fn: Function() -> index
         """
         if not self.ctx.IsCaptureLoaded():
             raise ValueError("No capture loaded")
 
-        result = {"matches": [], "scanned_draws": 0}
+        capture = capture_filename(self.ctx)
+        if capture != self._indices_capture:
+            self.clear_indices()
+            self._indices_capture = capture
+
+        index = self._indices.get(name)
+        if index is None:
+            index = build_fn()
+            # Without a filename there is no telling captures apart
+            if capture:
+                self._indices[name] = index
+        return index
+
+    def _build_draw_index(self):
+        """Finish (or run) the draw scan for the loaded capture"""
+        result = {"index": None}
 
         def callback(controller):
-            root_actions = controller.GetRootActions()
-            structured_file = controller.GetStructuredFile()
-            all_actions = Helpers.flatten_actions(root_actions)
-
-            # Filter to only draw calls and dispatches
-            draw_actions = [
-                a for a in all_actions
-                if a.flags & (rd.ActionFlags.Drawcall | rd.ActionFlags.Dispatch)
-            ]
-            result["scanned_draws"] = len(draw_actions)
-
-            for action in draw_actions:
-                controller.SetFrameEvent(action.eventId, False)
-                pipe = controller.GetPipelineState()
-
-                match_reason = matcher_fn(pipe, controller, action, self.ctx)
-                if match_reason:
-                    result["matches"].append({
-                        "event_id": action.eventId,
-                        "name": action.GetName(structured_file),
-                        "match_reason": match_reason,
-                    })
+            # Runs after any warm-up jobs queued so far, which may have
+            # finished the scan already
+            index = self._indices.get("draws")
+            if index is None:
+                scan = self._scan or _DrawScan(self.ctx, controller)
+                scan.run(controller)
+                index = scan.index
+            result["index"] = index
 
         self._invoke(callback)
-        result["total_matches"] = len(result["matches"])
-        return result
+        return result["index"]
+
+    def warm_up(self, replay):
+        """
+        Start building the draw index in the background, if enabled with
+        RENDERDOC_MCP_WARM_UP.
+
+        The scan is queued on the replay thread a chunk of draws at a time,
+        so requests arriving meanwhile only wait for the current chunk. A
+        search that needs the index first finishes the scan itself.
+
+        Args:
+            replay: The ReplayManager, for AsyncInvoke
+        """
+        if not _WARM_UP:
+            return
+        capture = capture_filename(self.ctx)
+        if not capture:
+            return
+        self.clear_indices()
+        self._indices_capture = capture
+        state = {"scan": None}
+
+        def step(controller):
+            scan = state["scan"]
+            if scan is None:
+                scan = state["scan"] = self._scan = _DrawScan(self.ctx, controller)
+            elif self._scan is not scan:
+                # Capture changed or indices cleared since
+                return
+            if scan.run(controller, _WARM_UP_CHUNK):
+                if self._indices_capture == capture:
+                    self._indices.setdefault("draws", scan.index)
+                self._scan = None
+            else:
+                replay.AsyncInvoke(step)
+
+        replay.AsyncInvoke(step)
+
+    @staticmethod
+    def _result(matches, draw_index):
+        """Build a search result from (event_id, name, match_reason) tuples"""
+        return {
+            "matches": [
+                {"event_id": event_id, "name": name, "match_reason": reason}
+                for event_id, name, reason in matches
+            ],
+            "scanned_draws": len(draw_index["draws"]),
+            "total_matches": len(matches),
+        }
 
     def find_draws_by_shader(self, shader_name, stage=None):
         """Find all draw calls using a shader with the given name (partial match)."""
-        # Determine which stages to check
-        if stage:
-            stages_to_check = [Parsers.parse_stage(stage)]
-        else:
-            stages_to_check = Helpers.get_all_shader_stages()
+        stage_filter = _STAGE_NAMES[Parsers.parse_stage(stage)] if stage else None
+        draw_index = self._get_index("draws", self._build_draw_index)
+        entry_points = self._get_index(
+            "entry_points",
+            lambda: _SubstringIndex(
+                (s[2], s[2]) for d in draw_index["draws"] for s in d[2]
+                if s[2] is not None
+            ),
+        )
+        shader_names = self._get_index(
+            "shader_names",
+            lambda: _SubstringIndex(
+                (draw_index["names"][s[1]], s[1])
+                for d in draw_index["draws"] for s in d[2]
+                if draw_index["names"][s[1]]
+            ),
+        )
 
-        def matcher(pipe, controller, action, ctx):
-            for s in stages_to_check:
-                shader = pipe.GetShader(s)
-                if shader == rd.ResourceId.Null():
+        matched_entry_points = entry_points.find(shader_name)
+        matched_shaders = shader_names.find(shader_name)
+        names = draw_index["names"]
+        matches = []
+        for event_id, name, shaders, _ in draw_index["draws"]:
+            for s, shader, entry_point in shaders:
+                if entry_point is None:
                     continue
+                if stage_filter is not None and s != stage_filter:
+                    continue
+                if entry_point in matched_entry_points:
+                    reason = "%s entry_point: '%s'" % (s, entry_point)
+                elif shader in matched_shaders:
+                    reason = "%s name: '%s'" % (s, names[shader])
+                else:
+                    continue
+                matches.append((event_id, name, reason))
+                break
 
-                reflection = pipe.GetShaderReflection(s)
-                if reflection:
-                    entry_point = pipe.GetShaderEntryPoint(s)
-                    shader_debug_name = ""
-                    try:
-                        shader_debug_name = ctx.GetResourceName(shader)
-                    except Exception:
-                        pass
-
-                    if shader_name.lower() in entry_point.lower():
-                        return "%s entry_point: '%s'" % (str(s), entry_point)
-                    elif shader_debug_name and shader_name.lower() in shader_debug_name.lower():
-                        return "%s name: '%s'" % (str(s), shader_debug_name)
-            return None
-
-        return self._search_draws(matcher)
+        return self._result(matches, draw_index)
 
     def find_draws_by_texture(self, texture_name):
         """Find all draw calls using a texture with the given name (partial match)."""
-        stages_to_check = Helpers.get_all_shader_stages()
-
-        def matcher(pipe, controller, action, ctx):
-            # Check SRVs (read-only resources)
-            for stage in stages_to_check:
-                try:
-                    srvs = pipe.GetReadOnlyResources(stage, False)
-                    for srv in srvs:
-                        if srv.descriptor.resource == rd.ResourceId.Null():
-                            continue
-                        res_name = ""
-                        try:
-                            res_name = ctx.GetResourceName(srv.descriptor.resource)
-                        except Exception:
-                            pass
-                        if res_name and texture_name.lower() in res_name.lower():
-                            return "%s SRV: '%s'" % (str(stage), res_name)
-                except Exception:
-                    pass
-
-                # Check UAVs (read-write resources)
-                try:
-                    uavs = pipe.GetReadWriteResources(stage, False)
-                    for uav in uavs:
-                        if uav.descriptor.resource == rd.ResourceId.Null():
-                            continue
-                        res_name = ""
-                        try:
-                            res_name = ctx.GetResourceName(uav.descriptor.resource)
-                        except Exception:
-                            pass
-                        if res_name and texture_name.lower() in res_name.lower():
-                            return "%s UAV: '%s'" % (str(stage), res_name)
-                except Exception:
-                    pass
-
-            # Check render targets
-            try:
-                om = pipe.GetOutputMerger()
-                if om:
-                    for i, rt in enumerate(om.renderTargets):
-                        if rt.resourceId != rd.ResourceId.Null():
-                            res_name = ""
-                            try:
-                                res_name = ctx.GetResourceName(rt.resourceId)
-                            except Exception:
-                                pass
-                            if res_name and texture_name.lower() in res_name.lower():
-                                return "RenderTarget[%d]: '%s'" % (i, res_name)
-            except Exception:
-                pass
+        draw_index = self._get_index("draws", self._build_draw_index)
+        resource_names = self._get_index(
+            "resource_names",
+            lambda: _SubstringIndex(
+                (name, rid) for rid, name in draw_index["names"].items() if name
+            ),
+        )
 
-            return None
+        matched = resource_names.find(texture_name)
+        names = draw_index["names"]
+        matches = []
+        if matched:
+            for event_id, name, _, bindings in draw_index["draws"]:
+                for kind, stage, slot, rid in bindings:
+                    if kind == "DepthTarget" or rid not in matched:
+                        continue
+                    if kind == "RenderTarget":
+                        reason = "RenderTarget[%d]: '%s'" % (slot, names[rid])
+                    else:
+                        reason = "%s %s: '%s'" % (stage, kind, names[rid])
+                    matches.append((event_id, name, reason))
+                    break
 
-        return self._search_draws(matcher)
+        return self._result(matches, draw_index)
 
     def find_draws_by_resource(self, resource_id):
         """Find all draw calls using a specific resource ID (exact match)."""
         target_rid = Parsers.parse_resource_id(resource_id)
-        stages_to_check = Helpers.get_all_shader_stages()
-
-        def matcher(pipe, controller, action, ctx):
-            # Check shaders
-            for stage in stages_to_check:
-                shader = pipe.GetShader(stage)
-                if shader == target_rid:
-                    return "%s shader" % str(stage)
-
-            # Check SRVs and UAVs
-            for stage in stages_to_check:
-                try:
-                    srvs = pipe.GetReadOnlyResources(stage, False)
-                    for srv in srvs:
-                        if srv.descriptor.resource == target_rid:
-                            return "%s SRV slot %d" % (str(stage), srv.access.index)
-                except Exception:
-                    pass
-
-                try:
-                    uavs = pipe.GetReadWriteResources(stage, False)
-                    for uav in uavs:
-                        if uav.descriptor.resource == target_rid:
-                            return "%s UAV slot %d" % (str(stage), uav.access.index)
-                except Exception:
-                    pass
-
-            # Check render targets
-            try:
-                om = pipe.GetOutputMerger()
-                if om:
-                    for i, rt in enumerate(om.renderTargets):
-                        if rt.resourceId == target_rid:
-                            return "RenderTarget[%d]" % i
-                    if om.depthTarget.resourceId == target_rid:
-                        return "DepthTarget"
-            except Exception:
-                pass
+        draw_index = self._get_index("draws", self._build_draw_index)
+        resource_index = self._get_index(
+            "resources", lambda: self._build_resource_index(draw_index)
+        )
+        return self._result(resource_index.get(target_rid, []), draw_index)
+
+    @staticmethod
+    def _build_resource_index(draw_index):
+        """
+        Map each bound ResourceId to the draws using it, in event order.
 
-            return None
+        A draw is listed once per resource, with the first binding found in
+        the order shaders, SRVs/UAVs by stage, render targets, depth target.
+        """
+        index = {}
+        for event_id, name, shaders, bindings in draw_index["draws"]:
+            seen = set()
+            reasons = [(shader, "%s shader" % s) for s, shader, _ in shaders]
+            for kind, stage, slot, rid in bindings:
+                if kind == "RenderTarget":
+                    reason = "RenderTarget[%d]" % slot
+                elif kind == "DepthTarget":
+                    reason = "DepthTarget"
+                else:
+                    reason = "%s %s slot %d" % (stage, kind, slot)
+                reasons.append((rid, reason))
 
-        return self._search_draws(matcher)
+            for rid, reason in reasons:
+                if rid not in seen:
+                    seen.add(rid)
+                    index.setdefault(rid, []).append((event_id, name, reason))
+        return index
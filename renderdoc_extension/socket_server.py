@@ -7,17 +7,52 @@ import json
 import os
 import traceback
 import tempfile
+import zlib
 
-from PySide2.QtCore import QObject, QTimer
+from PySide2.QtCore import QFileSystemWatcher, QObject, QTimer
 
 
 # IPC directory
 IPC_DIR = os.path.join(tempfile.gettempdir(), "renderdoc_mcp")
 REQUEST_FILE = os.path.join(IPC_DIR, "request.json")
 RESPONSE_FILE = os.path.join(IPC_DIR, "response.json")
+RESPONSE_TMP_FILE = os.path.join(IPC_DIR, "response.json.tmp")
 LOCK_FILE = os.path.join(IPC_DIR, "lock")
 
 
+# Response encoder, built once; json.dumps with non-default options builds a
+# new encoder on every call. Non-ASCII text (marker and resource names) is
+# kept as UTF-8 so the MCP server can pass results through verbatim. Compact
+# separators drop the padding space after every key and item, and responses
+# are plain trees, so the circular-reference check is skipped. All of these
+# still go through the C encoder.
+_ENCODER = json.JSONEncoder(
+    ensure_ascii=False,
+    separators=(",", ":"),
+    check_circular=False,
+)
+
+# Responses smaller than this are sent as-is even when the client accepts
+# zlib; compressing them saves little and costs a round through the codec
+COMPRESS_MIN_SIZE = 16 * 1024
+
+# Methods whose results are mostly base64 pixel data, which barely compresses
+_INCOMPRESSIBLE_METHODS = frozenset(["get_texture_data"])
+
+
+def _should_compress(request, size):
+    """Whether to zlib-compress a response of the given size"""
+    if size < COMPRESS_MIN_SIZE:
+        return False
+    if isinstance(request, list):
+        request = request[0] if request else None
+    return (
+        isinstance(request, dict)
+        and request.get("accept_encoding") == "zlib"
+        and request.get("method") not in _INCOMPRESSIBLE_METHODS
+    )
+
+
 class MCPBridgeServer(QObject):
     """File-based IPC server for MCP bridge communication"""
 
@@ -25,6 +60,7 @@ class MCPBridgeServer(QObject):
         super(MCPBridgeServer, self).__init__(parent)
         self.handler = handler
         self._timer = None
+        self._watcher = None
         self._running = False
 
         # Create IPC directory
@@ -38,7 +74,14 @@ class MCPBridgeServer(QObject):
         # Clean up old files
         self._cleanup_files()
 
-        # Start polling timer (check every 100ms)
+        # Pick up a request as soon as the client renames it into the IPC
+        # directory, rather than on the next timer tick. Everything still
+        # runs on the UI thread, one request at a time.
+        self._watcher = QFileSystemWatcher([IPC_DIR], self)
+        self._watcher.directoryChanged.connect(self._poll_request)
+
+        # Polling timer (check every 100ms) as a fallback for missed
+        # change notifications
         self._timer = QTimer(self)
         self._timer.timeout.connect(self._poll_request)
         self._timer.start(100)
@@ -53,6 +96,9 @@ class MCPBridgeServer(QObject):
         if self._timer:
             self._timer.stop()
             self._timer = None
+        if self._watcher:
+            self._watcher.directoryChanged.disconnect(self._poll_request)
+            self._watcher = None
         self._cleanup_files()
         print("[MCP Bridge] Server stopped")
 
@@ -62,13 +108,27 @@ class MCPBridgeServer(QObject):
 
     def _cleanup_files(self):
         """Remove IPC files"""
-        for f in [REQUEST_FILE, RESPONSE_FILE, LOCK_FILE]:
+        for f in [REQUEST_FILE, RESPONSE_FILE, RESPONSE_TMP_FILE, LOCK_FILE]:
             try:
                 if os.path.exists(f):
                     os.remove(f)
             except Exception:
                 pass
 
+    def _dispatch(self, request):
+        """Run a decoded request (or batch) through the handler"""
+        try:
+            if isinstance(request, list):
+                return self.handler.handle_batch(request)
+            return self.handler.handle(request)
+        except Exception as e:
+            traceback.print_exc()
+            first = request[0] if isinstance(request, list) and request else request
+            return {
+                "id": first.get("id") if isinstance(first, dict) else None,
+                "error": {"code": -32603, "message": str(e)}
+            }
+
     def _poll_request(self):
         """Check for incoming request"""
         if not self._running:
@@ -83,26 +143,39 @@ class MCPBridgeServer(QObject):
             return
 
         try:
-            # Read request
-            with open(REQUEST_FILE, "r", encoding="utf-8") as f:
-                request = json.load(f)
+            # Read request. The client renames a finished request into
+            # place, so the file itself frames it: read it whole in binary
+            # and let json decode the UTF-8, bypassing the text-mode layer.
+            with open(REQUEST_FILE, "rb") as f:
+                data = f.read()
 
             # Remove request file
             os.remove(REQUEST_FILE)
 
-            # Process request
+            # Process request (a list is a batch, answered with a list)
+            request = None
             try:
-                response = self.handler.handle(request)
-            except Exception as e:
-                traceback.print_exc()
+                request = json.loads(data)
+            except ValueError as e:
+                # Answered with an id-less error, which the client takes as
+                # the answer to its pending request
                 response = {
-                    "id": request.get("id"),
-                    "error": {"code": -32603, "message": str(e)}
+                    "id": None,
+                    "error": {"code": -32700, "message": "Parse error: %s" % str(e)}
                 }
-
-            # Write response
-            with open(RESPONSE_FILE, "w", encoding="utf-8") as f:
-                json.dump(response, f)
+            else:
+                response = self._dispatch(request)
+
+            # Write response with a single write; json.dump would issue
+            # one write per encoder chunk
+            data = _ENCODER.encode(response).encode("utf-8")
+            if _should_compress(request, len(data)):
+                # Level 1 is fast and already shrinks JSON several times over
+                data = zlib.compress(data, 1)
+            # Rename into place so the client never reads a partial response
+            with open(RESPONSE_TMP_FILE, "wb") as f:
+                f.write(data)
+            os.replace(RESPONSE_TMP_FILE, RESPONSE_FILE)
 
         except Exception as e:
             print("[MCP Bridge] Error processing request: %s" % str(e))
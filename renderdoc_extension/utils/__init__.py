@@ -5,5 +5,14 @@ Utility classes for RenderDoc operations.
 from .parsers import Parsers
 from .serializers import Serializers
 from .helpers import Helpers
+from .cache import CaptureValue, ResourceIndex, ResultCache, capture_filename
 
-__all__ = ["Parsers", "Serializers", "Helpers"]
+__all__ = [
+    "Parsers",
+    "Serializers",
+    "Helpers",
+    "CaptureValue",
+    "ResourceIndex",
+    "ResultCache",
+    "capture_filename",
+]
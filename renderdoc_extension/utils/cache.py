@@ -0,0 +1,113 @@
+"""
+Per-capture caches for data derived from the loaded capture.
+"""
+
+from collections import OrderedDict
+
+
+def capture_filename(ctx):
+    """Filename of the loaded capture, or None if it cannot be determined"""
+    try:
+        return ctx.GetCaptureFilename()
+    except Exception:
+        return None
+
+
+class CaptureValue(object):
+    """
+    A value built from the loaded capture, kept until the capture changes.
+
+    The value is rebuilt on every get() while the capture filename is
+    unknown, as there is then no telling captures apart.
+    """
+
+    def __init__(self, ctx, build):
+        """
+        Args:
+            ctx: The pyrenderdoc CaptureContext
+            build: Function(*args) -> value, given the arguments of get()
+        """
+        self.ctx = ctx
+        self._build = build
+        self._value = None
+        self._capture = None
+
+    def clear(self):
+        """Drop the value (e.g. when a capture is reopened)"""
+        self._value = None
+        self._capture = None
+
+    def get(self, *args):
+        """Return the value for the loaded capture, building it if needed"""
+        capture = capture_filename(self.ctx)
+        if self._value is None or not capture or capture != self._capture:
+            self._value = self._build(*args)
+            self._capture = capture
+        return self._value
+
+
+def _index_resources(controller):
+    """(textures, buffers) descriptions keyed by ResourceId"""
+    return (
+        dict((tex.resourceId, tex) for tex in controller.GetTextures()),
+        dict((buf.resourceId, buf) for buf in controller.GetBuffers()),
+    )
+
+
+class ResourceIndex(CaptureValue):
+    """
+    Texture and buffer descriptions by ResourceId, fetched once per capture
+    instead of scanning GetTextures()/GetBuffers() on every lookup.
+    get(controller) must run on the replay thread.
+    """
+
+    def __init__(self, ctx):
+        super(ResourceIndex, self).__init__(ctx, _index_resources)
+
+
+class ResultCache(object):
+    """
+    Least-recently-used cache of query results for the loaded capture.
+
+    Results derived from a capture never change while it stays loaded, so
+    they are kept by key until the capture changes. Nothing is cached while
+    the capture filename is unknown. Cached values are shared, so callers
+    must not modify them.
+    """
+
+    def __init__(self, ctx, maxsize=256):
+        self.ctx = ctx
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._capture = None
+
+    def clear(self):
+        """Drop all cached results (e.g. when a capture is reopened)"""
+        self._entries.clear()
+        self._capture = None
+
+    def _current_capture(self):
+        """Filename of the loaded capture, dropping results from another"""
+        capture = capture_filename(self.ctx)
+        if capture != self._capture:
+            self._entries.clear()
+            self._capture = capture
+        return capture
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        if not self._current_capture():
+            return None
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        """Cache a result for key, evicting the least recently used"""
+        if not self._current_capture():
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
@@ -2,31 +2,86 @@
 Common helper functions for RenderDoc operations.
 """
 
+import binascii
+import functools
+import os
+import traceback
+
 import renderdoc as rd
 
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+
+# Set RENDERDOC_MCP_DEBUG=1 in RenderDoc's environment to append tracebacks
+# to the error messages returned for unexpected failures
+_DEBUG = os.environ.get("RENDERDOC_MCP_DEBUG", "").lower() in ("1", "true", "yes")
+
 
 class Helpers:
     """Common helper functions (static methods)"""
 
+    @staticmethod
+    def iter_actions(actions):
+        """Iterate hierarchical actions depth-first, parents before children"""
+        stack = [iter(actions)]
+        while stack:
+            for action in stack[-1]:
+                yield action
+                if action.children:
+                    stack.append(iter(action.children))
+                    break
+            else:
+                stack.pop()
+
     @staticmethod
     def flatten_actions(actions):
         """Flatten hierarchical actions to a list"""
-        flat = []
-        for action in actions:
-            flat.append(action)
-            if action.children:
-                flat.extend(Helpers.flatten_actions(action.children))
-        return flat
+        return list(Helpers.iter_actions(actions))
 
     @staticmethod
-    def count_children(action):
-        """Count total number of children recursively"""
-        count = 0
-        if action.children:
-            for child in action.children:
-                count += 1
-                count += Helpers.count_children(child)
-        return count
+    @functools.lru_cache(maxsize=256, typed=True)
+    def enum_str(value):
+        """
+        str() of a RenderDoc enum value, memoized. Enums have few distinct
+        values; typed keeps equal ints of different enum types apart.
+        """
+        return str(value)
+
+    @staticmethod
+    def format_error(prefix, error):
+        """
+        Error message for an exception being handled. The traceback is only
+        formatted in debug mode; walking the stack is not free.
+        """
+        if _DEBUG:
+            return "%s: %s\n%s" % (prefix, str(error), traceback.format_exc())
+        return "%s: %s" % (prefix, str(error))
+
+    @staticmethod
+    def b64encode(data):
+        """
+        Base64 text of bytes or a memoryview, using pybase64's SIMD encoder
+        if it is importable from RenderDoc's Python, else binascii directly
+        (base64.b64encode is a Python wrapper around the same call).
+
+        A memoryview is released before the text copy is made. When the view
+        is all that holds the underlying data, that is freed too, so raw
+        data, encoded bytes and text are never all alive at once.
+        """
+        if not len(data):
+            return ""
+        if pybase64 is not None:
+            text = pybase64.b64encode_as_string(data)
+            if isinstance(data, memoryview):
+                data.release()
+            return text
+        encoded = binascii.b2a_base64(data, newline=False)
+        if isinstance(data, memoryview):
+            data.release()
+        return encoded.decode("ascii")
 
     @staticmethod
     def get_all_shader_stages():
@@ -4,6 +4,110 @@ Serialization utility functions for RenderDoc data types.
 
 import renderdoc as rd
 
+from .helpers import Helpers
+
+
+# Flags reported by serialize_flags, in output order. Resolved to plain ints
+# once; bitwise ops on the enum members go through Python-level operators.
+_FLAG_NAMES = tuple((int(flag), name) for flag, name in [
+    (rd.ActionFlags.Drawcall, "Drawcall"),
+    (rd.ActionFlags.Dispatch, "Dispatch"),
+    (rd.ActionFlags.Clear, "Clear"),
+    (rd.ActionFlags.PushMarker, "PushMarker"),
+    (rd.ActionFlags.PopMarker, "PopMarker"),
+    (rd.ActionFlags.SetMarker, "SetMarker"),
+    (rd.ActionFlags.Present, "Present"),
+    (rd.ActionFlags.Copy, "Copy"),
+    (rd.ActionFlags.Resolve, "Resolve"),
+    (rd.ActionFlags.GenMips, "GenMips"),
+    (rd.ActionFlags.PassBoundary, "PassBoundary"),
+    (rd.ActionFlags.Indexed, "Indexed"),
+    (rd.ActionFlags.Instanced, "Instanced"),
+    (rd.ActionFlags.Auto, "Auto"),
+    (rd.ActionFlags.Indirect, "Indirect"),
+    (rd.ActionFlags.ClearColor, "ClearColor"),
+    (rd.ActionFlags.ClearDepthStencil, "ClearDepthStencil"),
+    (rd.ActionFlags.BeginPass, "BeginPass"),
+    (rd.ActionFlags.EndPass, "EndPass"),
+])
+
+# Flag name tuples by flags value; a capture only uses a handful of distinct
+# combinations, so this stays small
+_flag_names_cache = {}
+
+_PUSH_MARKER = int(rd.ActionFlags.PushMarker)
+_SET_MARKER = int(rd.ActionFlags.SetMarker)
+_POP_MARKER = int(rd.ActionFlags.PopMarker)
+_MARKER_FLAGS = _PUSH_MARKER | _SET_MARKER | _POP_MARKER
+
+# ShaderValue member holding the components of each scalar variable type
+_VALUE_FIELDS = {
+    rd.VarType.Float: "f32v",
+    rd.VarType.Int: "s32v",
+    rd.VarType.UInt: "u32v",
+}
+
+
+def _flag_names(flags):
+    """Tuple of flag names set in flags (shared; copy before handing out)"""
+    flags = int(flags)
+    names = _flag_names_cache.get(flags)
+    if names is None:
+        names = tuple(name for flag, name in _FLAG_NAMES if flags & flag)
+        _flag_names_cache[flags] = names
+    return names
+
+
+def _action_name(action, structured_file, names):
+    """Name of an action, looked up in (and added to) names by event id"""
+    event_id = action.eventId
+    name = names.get(event_id)
+    if name is None:
+        name = names[event_id] = action.GetName(structured_file)
+    return name
+
+
+def _outside_range(children, event_id_min, event_id_max):
+    """
+    Whether no action in a child list (or below) can be within the event
+    range. Siblings are in event order, so the bounds lie along the first-
+    and last-child chains.
+    """
+    if event_id_min is not None:
+        last = 0
+        node = children
+        while node:
+            node = node[-1]
+            last = max(last, node.eventId)
+            node = node.children
+        if last < event_id_min:
+            return True
+    if event_id_max is not None:
+        first = children[0].eventId
+        node = children
+        while node:
+            node = node[0]
+            first = min(first, node.eventId)
+            node = node.children
+        if first > event_id_max:
+            return True
+    return False
+
+
+def _action_item(action, flags, name, children):
+    """Serialized form of one action; children is omitted when empty"""
+    item = {
+        "event_id": action.eventId,
+        "action_id": action.actionId,
+        "name": name,
+        "flags": list(_flag_names(flags)),
+        "num_indices": action.numIndices,
+        "num_instances": action.numInstances,
+    }
+    if children:
+        item["children"] = children
+    return item
+
 
 class Serializers:
     """Serialization utility functions (static methods)"""
@@ -11,64 +115,52 @@ class Serializers:
     @staticmethod
     def serialize_flags(flags):
         """Convert ActionFlags to list of strings"""
-        flag_names = []
-        flag_map = [
-            (rd.ActionFlags.Drawcall, "Drawcall"),
-            (rd.ActionFlags.Dispatch, "Dispatch"),
-            (rd.ActionFlags.Clear, "Clear"),
-            (rd.ActionFlags.PushMarker, "PushMarker"),
-            (rd.ActionFlags.PopMarker, "PopMarker"),
-            (rd.ActionFlags.SetMarker, "SetMarker"),
-            (rd.ActionFlags.Present, "Present"),
-            (rd.ActionFlags.Copy, "Copy"),
-            (rd.ActionFlags.Resolve, "Resolve"),
-            (rd.ActionFlags.GenMips, "GenMips"),
-            (rd.ActionFlags.PassBoundary, "PassBoundary"),
-            (rd.ActionFlags.Indexed, "Indexed"),
-            (rd.ActionFlags.Instanced, "Instanced"),
-            (rd.ActionFlags.Auto, "Auto"),
-            (rd.ActionFlags.Indirect, "Indirect"),
-            (rd.ActionFlags.ClearColor, "ClearColor"),
-            (rd.ActionFlags.ClearDepthStencil, "ClearDepthStencil"),
-            (rd.ActionFlags.BeginPass, "BeginPass"),
-            (rd.ActionFlags.EndPass, "EndPass"),
-        ]
-        for flag, name in flag_map:
-            if flags & flag:
-                flag_names.append(name)
-        return flag_names
+        return list(_flag_names(flags))
 
     @staticmethod
     def serialize_variables(variables):
         """Serialize shader variables to JSON format"""
+        # Struct members are walked with an explicit stack of (remaining
+        # variables, output list) rather than recursion; a member's dict is
+        # placed before its own members are filled in, so order is unchanged
         result = []
-        for var in variables:
-            var_info = {
-                "name": var.name,
-                "type": str(var.type),
-                "rows": var.rows,
-                "columns": var.columns,
-            }
-
-            # Get value based on type
-            try:
-                if var.type == rd.VarType.Float:
-                    count = var.rows * var.columns
-                    var_info["value"] = list(var.value.f32v[:count])
-                elif var.type == rd.VarType.Int:
-                    count = var.rows * var.columns
-                    var_info["value"] = list(var.value.s32v[:count])
-                elif var.type == rd.VarType.UInt:
-                    count = var.rows * var.columns
-                    var_info["value"] = list(var.value.u32v[:count])
-            except Exception:
-                pass
-
-            # Nested members
-            if var.members:
-                var_info["members"] = Serializers.serialize_variables(var.members)
-
-            result.append(var_info)
+        stack = [(iter(variables), result)]
+        value_fields = _VALUE_FIELDS
+        enum_str = Helpers.enum_str
+        while stack:
+            remaining, out = stack[-1]
+            for var in remaining:
+                var_type = var.type
+                rows = var.rows
+                columns = var.columns
+                var_info = {
+                    "name": var.name,
+                    "type": enum_str(var_type),
+                    "rows": rows,
+                    "columns": columns,
+                }
+
+                # Get value based on type; var.type and the dimensions are
+                # read once, as every SWIG attribute access crosses into C++
+                field = value_fields.get(var_type)
+                if field is not None:
+                    try:
+                        var_info["value"] = list(
+                            getattr(var.value, field)[:rows * columns]
+                        )
+                    except Exception:
+                        pass
+
+                out.append(var_info)
+
+                # Nested members (each access converts the whole list)
+                members = var.members
+                if members:
+                    var_info["members"] = member_out = []
+                    stack.append((iter(members), member_out))
+                    break
+            else:
+                stack.pop()
 
         return result
 
@@ -84,6 +176,7 @@ class Serializers:
         only_actions=False,
         flags_filter=None,
         _in_matching_marker=False,
+        names=None,
     ):
         """
         Serialize action list to JSON-compatible format with filtering.
@@ -98,113 +191,178 @@ class Serializers:
             event_id_max: Only include actions with event_id <= this value
             only_actions: Exclude marker actions (PushMarker/PopMarker/SetMarker)
             flags_filter: Only include actions with these flags
-            _in_matching_marker: Internal flag for marker_filter recursion
+            _in_matching_marker: Whether actions start inside a matching marker
+            names: Optional dict of action names by event id, filled in as
+                names are fetched; pass the same dict across calls for the
+                same capture to fetch each name from RenderDoc only once
         """
+        if names is None:
+            names = {}
+        flags_filter_set = set(flags_filter) if flags_filter else None
+        check_range = event_id_min is not None or event_id_max is not None
+
+        # Whether a marker name contains any excluded string, by name. Marker
+        # names repeat heavily within a frame, so each distinct name is only
+        # tested against the exclude list once.
+        excluded_names = {}
+
+        # Depth-first walk with an explicit stack, so deep marker trees cost
+        # no Python recursion. Each frame is (remaining actions, whether
+        # they are inside a matching marker, output list, parent). parent is
+        # the (action, flags, name, is_marker, output list) of the action
+        # whose children the frame collects, emitted once they are known;
+        # None when the frame's output is an existing list.
         serialized = []
+        stack = [(iter(actions), _in_matching_marker, serialized, None)]
 
-        # Build flags filter set for efficient lookup
-        flags_filter_set = None
-        if flags_filter:
-            flags_filter_set = set(flags_filter)
+        while stack:
+            remaining, in_matching_marker, out, parent = stack[-1]
 
-        for action in actions:
-            name = action.GetName(structured_file)
-            flags = action.flags
+            for action in remaining:
+                flags = int(action.flags)
+                is_marker = flags & _MARKER_FLAGS
 
-            # Check if this is a marker
-            is_push_marker = flags & rd.ActionFlags.PushMarker
-            is_set_marker = flags & rd.ActionFlags.SetMarker
-            is_pop_marker = flags & rd.ActionFlags.PopMarker
-            is_marker = is_push_marker or is_set_marker or is_pop_marker
+                if is_marker:
+                    name = _action_name(action, structured_file, names)
 
-            # 1. exclude_markers check - skip this marker and all its children
-            if exclude_markers and is_marker:
-                if any(ex in name for ex in exclude_markers):
-                    continue
+                    # 1. exclude_markers check - skip this marker and all its
+                    # children
+                    if exclude_markers:
+                        excluded = excluded_names.get(name)
+                        if excluded is None:
+                            excluded = excluded_names[name] = any(
+                                ex in name for ex in exclude_markers
+                            )
+                        if excluded:
+                            continue
 
-            # 2. marker_filter check - track if we're inside a matching marker
-            in_matching = _in_matching_marker
-            if marker_filter:
-                if is_push_marker and marker_filter in name:
+                # 2. marker_filter check - track if we're inside a matching marker
+                in_matching = in_matching_marker
+                if marker_filter and flags & _PUSH_MARKER and marker_filter in name:
                     in_matching = True
 
-            # 3. Determine if action passes event_id range filter
-            # For markers with children, we check children even if marker is outside range
-            in_range = True
-            if not is_marker:
-                if event_id_min is not None and action.eventId < event_id_min:
-                    in_range = False
-                if event_id_max is not None and action.eventId > event_id_max:
-                    in_range = False
-
-            # 4. only_actions check - skip markers but process their children
-            if only_actions and is_marker:
-                if include_children and action.children:
-                    child_actions = Serializers.serialize_actions(
-                        action.children,
-                        structured_file,
-                        include_children,
-                        marker_filter=marker_filter,
-                        exclude_markers=exclude_markers,
-                        event_id_min=event_id_min,
-                        event_id_max=event_id_max,
-                        only_actions=only_actions,
-                        flags_filter=flags_filter,
-                        _in_matching_marker=in_matching,
-                    )
-                    serialized.extend(child_actions)
-                continue
-
-            # 5. flags_filter check - only for non-markers
-            if flags_filter_set and not is_marker:
-                flag_names = Serializers.serialize_flags(flags)
-                if not any(f in flags_filter_set for f in flag_names):
+                children = action.children if include_children else None
+
+                # Skip a marker's subtree outright when none of it can fall
+                # in the event range; markers are only emitted for children
+                if children and is_marker and check_range and _outside_range(
+                    children, event_id_min, event_id_max
+                ):
+                    continue
+
+                # 3. only_actions check - skip markers but process their
+                # children, which go straight into this frame's output
+                if only_actions and is_marker:
+                    if children:
+                        stack.append((iter(children), in_matching, out, None))
+                        break
                     continue
 
-            # 6. Check if this action should be included based on marker_filter
-            passes_marker_filter = not marker_filter or in_matching
-
-            # 7. For markers with children, check if any children pass filters
-            children_result = []
-            has_passing_children = False
-            if include_children and action.children:
-                children_result = Serializers.serialize_actions(
-                    action.children,
-                    structured_file,
-                    include_children,
-                    marker_filter=marker_filter,
-                    exclude_markers=exclude_markers,
-                    event_id_min=event_id_min,
-                    event_id_max=event_id_max,
-                    only_actions=only_actions,
-                    flags_filter=flags_filter,
-                    _in_matching_marker=in_matching,
-                )
-                has_passing_children = len(children_result) > 0
-
-            # Include the action if:
-            # - It passes all filters (for leaf actions)
-            # - It's a marker with children that pass filters (to maintain hierarchy)
-            should_include = False
-            if is_marker:
-                # Include marker if it has children that pass filters
-                should_include = has_passing_children and passes_marker_filter
+                # 4. Check if this action should be included based on
+                # marker_filter
+                passes_marker_filter = not marker_filter or in_matching
+
+                if not is_marker:
+                    # 5. event_id range filter (markers are judged by their
+                    # children instead)
+                    event_id = action.eventId
+                    if event_id_min is not None and event_id < event_id_min:
+                        continue
+                    if event_id_max is not None and event_id > event_id_max:
+                        continue
+
+                    # 6. flags_filter check - only for non-markers
+                    if flags_filter_set and flags_filter_set.isdisjoint(
+                        _flag_names(flags)
+                    ):
+                        continue
+
+                    if not passes_marker_filter:
+                        continue
+                    name = _action_name(action, structured_file, names)
+                elif not passes_marker_filter:
+                    continue
+
+                # 7. Children are walked before the action is emitted; a
+                # marker is only included (to maintain the hierarchy) if some
+                # of its children pass the filters
+                if children:
+                    stack.append((
+                        iter(children),
+                        in_matching,
+                        [],
+                        (action, flags, name, is_marker, out),
+                    ))
+                    break
+                if not is_marker:
+                    out.append(_action_item(action, flags, name, None))
             else:
-                # Include leaf action if it passes all filters
-                should_include = in_range and passes_marker_filter
-
-            if should_include:
-                flag_names = Serializers.serialize_flags(flags)
-                item = {
-                    "event_id": action.eventId,
-                    "action_id": action.actionId,
-                    "name": name,
-                    "flags": flag_names,
-                    "num_indices": action.numIndices,
-                    "num_instances": action.numInstances,
-                }
-                if children_result:
-                    item["children"] = children_result
-                serialized.append(item)
+                # This frame is done; emit the action it belongs to
+                stack.pop()
+                if parent is not None:
+                    action, flags, name, is_marker, parent_out = parent
+                    if out or not is_marker:
+                        parent_out.append(_action_item(action, flags, name, out))
 
         return serialized
+
+    @staticmethod
+    def serialize_actions_compact(
+        actions,
+        structured_file,
+        marker_filter=None,
+        event_id_min=None,
+        event_id_max=None,
+        flags_filter=None,
+        names=None,
+    ):
+        """
+        Serialize top-level actions as parallel lists (one per field).
+
+        Selects the same actions as serialize_actions with
+        include_children=False: markers are never emitted without their
+        children, so only non-marker actions in range remain, and none can be
+        under a marker matched by marker_filter. Flags are the raw bit masks;
+        "flag_bits" maps each flag name to its bit.
+        """
+        if names is None:
+            names = {}
+        flags_filter_set = set(flags_filter) if flags_filter else None
+
+        event_ids = []
+        action_ids = []
+        action_names = []
+        action_flags = []
+        num_indices = []
+        num_instances = []
+
+        if not marker_filter:
+            for action in actions:
+                flags = int(action.flags)
+                if flags & _MARKER_FLAGS:
+                    continue
+                event_id = action.eventId
+                if event_id_min is not None and event_id < event_id_min:
+                    continue
+                if event_id_max is not None and event_id > event_id_max:
+                    continue
+                if flags_filter_set and flags_filter_set.isdisjoint(
+                    _flag_names(flags)
+                ):
+                    continue
+                event_ids.append(event_id)
+                action_ids.append(action.actionId)
+                action_names.append(_action_name(action, structured_file, names))
+                action_flags.append(flags)
+                num_indices.append(action.numIndices)
+                num_instances.append(action.numInstances)
+
+        return {
+            "event_ids": event_ids,
+            "action_ids": action_ids,
+            "names": action_names,
+            "flags": action_flags,
+            "num_indices": num_indices,
+            "num_instances": num_instances,
+            "flag_bits": {name: flag for flag, name in _FLAG_NAMES},
+        }
@@ -0,0 +1,217 @@
+"""Tests for the bridge client's response handling, against a fake IPC directory"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+import zlib
+from unittest import mock
+
+from mcp_server.bridge import client
+from mcp_server.bridge.client import (
+    RenderDocBridge,
+    RenderDocBridgeError,
+    _extract_result,
+)
+
+
+class FakeExtension(object):
+    """
+    Answers requests in an IPC directory the way the extension does.
+
+    respond(request) returns the response bytes for a decoded request (or
+    request array); the response is renamed into place like the real one.
+    """
+
+    def __init__(self, ipc_dir, respond):
+        self.request_file = os.path.join(ipc_dir, "request.json")
+        self.response_file = os.path.join(ipc_dir, "response.json")
+        self.respond = respond
+        self.requests = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with open(self.request_file, "rb") as f:
+                    data = f.read()
+                os.remove(self.request_file)
+            except FileNotFoundError:
+                time.sleep(0.001)
+                continue
+            request = json.loads(data)
+            self.requests.append(request)
+            response = self.respond(request)
+            tmp = self.response_file + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(response)
+            os.replace(tmp, self.response_file)
+
+
+def _envelope(request_id, **body):
+    body = dict({"id": request_id}, **body)
+    return json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+
+class ExtractResultTest(unittest.TestCase):
+    def test_result(self):
+        data = b'{"id":"1-1","result":{"a":[1,2],"b":"}"}}'
+        self.assertEqual(_extract_result(data), '{"a":[1,2],"b":"}"}')
+
+    def test_memoryview_and_trailing_whitespace(self):
+        data = memoryview(bytearray(b'{"id":"1-1","result": [1, 2] }\r\n'))
+        self.assertEqual(_extract_result(data), "[1, 2]")
+
+    def test_null_result(self):
+        self.assertEqual(_extract_result(b'{"id":"1-1","result":null}'), "null")
+
+    def test_error(self):
+        data = b'{"id":"1-1","error":{"code":-32000,"message":"x"}}'
+        self.assertIsNone(_extract_result(data))
+
+    def test_result_key_inside_error(self):
+        data = b'{"id":"1-1","error":{"code":-32000,"message":"\\"result\\":"}}'
+        self.assertIsNone(_extract_result(data))
+
+    def test_other_layout(self):
+        self.assertIsNone(_extract_result(b'{"id":"1-1"}'))
+        self.assertIsNone(_extract_result(b"[]"))
+
+
+class BridgeExchangeTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        ipc_dir = tmp.name
+        patcher = mock.patch.multiple(
+            client,
+            IPC_DIR=ipc_dir,
+            REQUEST_FILE=os.path.join(ipc_dir, "request.json"),
+            REQUEST_TMP_FILE=os.path.join(ipc_dir, "request.json.tmp"),
+            RESPONSE_FILE=os.path.join(ipc_dir, "response.json"),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.ipc_dir = ipc_dir
+        self.bridge = RenderDocBridge()
+        self.bridge.timeout = 5.0
+        self.addCleanup(self.bridge.close)
+
+    def serve(self, respond):
+        extension = FakeExtension(self.ipc_dir, respond)
+        self.addCleanup(extension.stop)
+        return extension
+
+    def test_call(self):
+        extension = self.serve(
+            lambda r: _envelope(r["id"], result={"method": r["method"], **r["params"]})
+        )
+        result = self.bridge.call("get_draw_calls", {"compact": True})
+        self.assertEqual(result, {"method": "get_draw_calls", "compact": True})
+        self.assertNotIn("accept_encoding", extension.requests[0])
+
+    def test_call_raw(self):
+        self.serve(lambda r: _envelope(r["id"], result={"values": [1, 2, 3]}))
+        raw = self.bridge.call_raw("get_buffer_contents", {"resource_id": "5"})
+        self.assertEqual(raw, '{"values":[1,2,3]}')
+
+    def test_error(self):
+        self.serve(
+            lambda r: _envelope(r["id"], error={"code": -32602, "message": "bad"})
+        )
+        with self.assertRaisesRegex(RenderDocBridgeError, r"\[-32602\] bad"):
+            self.bridge.call("get_shader_info", {"event_id": 1})
+        with self.assertRaisesRegex(RenderDocBridgeError, r"\[-32602\] bad"):
+            self.bridge.call_raw("get_shader_info", {"event_id": 1})
+
+    def test_null_id_error(self):
+        self.serve(
+            lambda r: _envelope(None, error={"code": -32700, "message": "Parse error"})
+        )
+        with self.assertRaisesRegex(RenderDocBridgeError, r"\[-32700\] Parse error"):
+            self.bridge.call("get_capture_status")
+
+    def test_stale_response_skipped(self):
+        def respond(request):
+            # A late answer to an earlier request lands first
+            stale = os.path.join(self.ipc_dir, "response.json")
+            with open(stale + ".tmp", "wb") as f:
+                f.write(_envelope("0-1", result="stale"))
+            os.replace(stale + ".tmp", stale)
+            time.sleep(0.1)
+            return _envelope(request["id"], result="fresh")
+
+        self.serve(respond)
+        self.assertEqual(self.bridge.call("get_capture_status"), "fresh")
+
+    def test_compressed_response(self):
+        self.bridge.compress = True
+        values = list(range(10000))
+        extension = self.serve(
+            lambda r: zlib.compress(_envelope(r["id"], result={"values": values}))
+        )
+        self.assertEqual(self.bridge.call("get_texture_data"), {"values": values})
+        self.assertEqual(extension.requests[0]["accept_encoding"], "zlib")
+        raw = self.bridge.call_raw("get_texture_data")
+        self.assertEqual(json.loads(raw), {"values": values})
+
+    def test_large_response(self):
+        blob = "x" * (client._BUFFER_MAX + 1)
+        self.serve(lambda r: _envelope(r["id"], result=blob))
+        self.assertEqual(self.bridge.call("get_buffer_contents"), blob)
+        self.assertEqual(self.bridge.call_raw("get_buffer_contents"), '"%s"' % blob)
+
+    def test_batch(self):
+        def respond(requests):
+            return json.dumps(
+                [{"id": r["id"], "result": r["params"]["n"] * 2} for r in requests]
+            ).encode("utf-8")
+
+        extension = self.serve(respond)
+        calls = [("get_draw_call_details", {"n": n}) for n in range(3)]
+        self.assertEqual(self.bridge.call_batch(calls), [0, 2, 4])
+        self.assertEqual(len(extension.requests), 1)
+        self.assertEqual(len(extension.requests[0]), 3)
+
+    def test_batch_error(self):
+        def respond(requests):
+            return json.dumps(
+                [
+                    {"id": requests[0]["id"], "result": 1},
+                    {"id": requests[1]["id"], "error": {"code": -32000, "message": "no"}},
+                ]
+            ).encode("utf-8")
+
+        self.serve(respond)
+        with self.assertRaisesRegex(RenderDocBridgeError, r"\[-32000\] no"):
+            self.bridge.call_batch([("a", None), ("b", None)])
+        first, second = self.bridge.call_batch(
+            [("a", None), ("b", None)], return_errors=True
+        )
+        self.assertEqual(first, 1)
+        self.assertIsInstance(second, RenderDocBridgeError)
+        self.assertEqual(str(second), "[-32000] no")
+
+    def test_batch_rejected_before_dispatch(self):
+        self.serve(
+            lambda r: _envelope(None, error={"code": -32700, "message": "Parse error"})
+        )
+        with self.assertRaisesRegex(RenderDocBridgeError, r"\[-32700\] Parse error"):
+            self.bridge.call_batch([("a", None), ("b", None)])
+
+    def test_missing_ipc_dir(self):
+        with mock.patch.object(client, "IPC_DIR", os.path.join(self.ipc_dir, "x")):
+            with self.assertRaisesRegex(RenderDocBridgeError, "Cannot connect"):
+                self.bridge.call("get_capture_status")
+
+
+if __name__ == "__main__":
+    unittest.main()